@@ -9,6 +9,7 @@ from airport.models import (
     Airport,
     Route,
     Flight,
+    SeatHold,
 )
 
 
@@ -32,3 +33,4 @@ admin.site.register(Airport)
 admin.site.register(Route)
 admin.site.register(Airplane)
 admin.site.register(Flight)
+admin.site.register(SeatHold)
@@ -0,0 +1,296 @@
+import json
+import os
+import statistics
+import time
+import tracemalloc
+from typing import Callable, NamedTuple
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from airport.benchmarks.datasets import SCALES, seed
+from airport.cache import response_cache
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Crew,
+    Flight,
+    Order,
+    Route,
+)
+from airport.throttling import rate_limit_backend
+from airport.urls import router
+
+SCALE_NAMES = os.environ.get("BENCHMARK_SCALES", "small,medium").split(",")
+REPEAT = int(os.environ.get("BENCHMARK_REPEAT", "20"))
+OUTPUT = os.environ.get("BENCHMARK_OUTPUT", "benchmark-results.json")
+PASSWORD = "benchmark"
+
+
+class Fixtures(NamedTuple):
+    """Existing rows the benchmarked requests refer to."""
+
+    user: object
+    airport_ids: list
+    airplane_type_id: int
+    airplane_id: int
+    crew_id: int
+    route_id: int
+    flight_ids: list
+
+    @classmethod
+    def load(cls):
+        user = get_user_model().objects.order_by("pk").first()
+        user.is_staff = True
+        user.set_password(PASSWORD)
+        user.save()
+        return cls(
+            user=user,
+            airport_ids=list(
+                Airport.objects.order_by("pk").values_list("pk", flat=True)[:2]
+            ),
+            airplane_type_id=AirplaneType.objects.earliest("pk").pk,
+            airplane_id=Airplane.objects.earliest("pk").pk,
+            crew_id=Crew.objects.earliest("pk").pk,
+            route_id=Route.objects.earliest("pk").pk,
+            flight_ids=list(
+                Flight.objects.order_by("pk").values_list("pk", flat=True)
+            ),
+        )
+
+
+def order_payload(fixtures, number):
+    flight_id = fixtures.flight_ids[number % len(fixtures.flight_ids)]
+    return {"auto_seats": [{"flight": flight_id, "count": 1}]}
+
+
+def route_payload(fixtures, number):
+    source, destination = fixtures.airport_ids
+    return {"source": source, "destination": destination, "distance": 100}
+
+
+def airplane_payload(fixtures, number):
+    return {
+        "name": f"Bench airplane {number}",
+        "rows": 10,
+        "seats_in_row": 4,
+        "airplane_type": fixtures.airplane_type_id,
+    }
+
+
+def flight_payload(fixtures, number):
+    return {
+        "route": fixtures.route_id,
+        "airplane": fixtures.airplane_id,
+        "crew": [fixtures.crew_id],
+        "departure_time": "2030-01-01T00:00:00Z",
+        "arrival_time": "2030-01-01T03:00:00Z",
+    }
+
+
+# payloads for the create action of each router viewset
+CREATE_PAYLOADS = {
+    "orders": order_payload,
+    "airplane_types": lambda fixtures, number: {"name": f"Bench {number}"},
+    "crews": lambda fixtures, number: {
+        "first_name": "Bench",
+        "last_name": f"Crew{number}",
+    },
+    "airports": lambda fixtures, number: {
+        "name": f"Bench airport {number}",
+        "closest_big_city": "Bench city",
+    },
+    "routes": route_payload,
+    "airplanes": airplane_payload,
+    "flights": flight_payload,
+}
+
+
+class Endpoint(NamedTuple):
+    name: str
+    action: str
+    url: Callable
+    payload: Callable = None
+    anonymous: bool = False
+
+
+def retrieve_url(basename, model):
+    def url(fixtures):
+        objects = model.objects.order_by("pk")
+        if model is Order:
+            objects = objects.filter(user=fixtures.user)
+        return reverse(f"airport:{basename}-detail", args=[objects[0].pk])
+
+    return url
+
+
+def router_endpoints():
+    for prefix, viewset, basename in router.registry:
+        name = f"airport:{basename}"
+        if hasattr(viewset, "list"):
+            yield Endpoint(
+                name,
+                "list",
+                lambda fixtures, b=basename: reverse(f"airport:{b}-list"),
+            )
+        if hasattr(viewset, "retrieve"):
+            yield Endpoint(
+                name,
+                "retrieve",
+                retrieve_url(basename, viewset.queryset.model),
+            )
+        if hasattr(viewset, "create"):
+            yield Endpoint(
+                name,
+                "create",
+                lambda fixtures, b=basename: reverse(f"airport:{b}-list"),
+                CREATE_PAYLOADS[basename],
+            )
+
+
+USER_ENDPOINTS = (
+    Endpoint(
+        "user:register",
+        "create",
+        lambda fixtures: reverse("user:register"),
+        lambda fixtures, number: {
+            "email": f"bench{number}@benchmark.test",
+            "password": PASSWORD,
+        },
+        anonymous=True,
+    ),
+    Endpoint("user:me", "retrieve", lambda fixtures: reverse("user:me")),
+    Endpoint(
+        "user:token_obtain_pair",
+        "create",
+        lambda fixtures: reverse("user:token_obtain_pair"),
+        lambda fixtures, number: {
+            "email": fixtures.user.email,
+            "password": PASSWORD,
+        },
+        anonymous=True,
+    ),
+)
+
+
+def clear_caches():
+    # every request starts cold and unthrottled
+    for cache in caches.all():
+        cache.clear()
+    response_cache.local.clear()
+    rate_limit_backend().clear()
+
+
+def percentile(timings, fraction):
+    return statistics.quantiles(timings, n=100, method="inclusive")[
+        round(fraction * 100) - 1
+    ]
+
+
+# the rows of the benchmark are only visible to the request thread
+@override_settings(OFFLOAD_VIEWS=False)
+class EndpointBenchmark(TestCase):
+    """
+    Query counts, latency and peak memory of every endpoint on growing
+    datasets, written to BENCHMARK_OUTPUT. Fails when the query count of
+    an endpoint depends on the dataset size.
+
+    Run with:
+        python manage.py test airport.benchmarks --pattern "bench_*.py"
+    """
+
+    def setUp(self):
+        self.counter = 0
+
+    def prepare(self, endpoint, fixtures):
+        """Return a callable sending one request to `endpoint`."""
+        client = APIClient()
+        if not endpoint.anonymous:
+            token = RefreshToken.for_user(fixtures.user).access_token
+            client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        url = endpoint.url(fixtures)
+        if endpoint.payload is None:
+            return lambda: client.get(url)
+
+        self.counter += 1
+        payload = endpoint.payload(fixtures, self.counter)
+        return lambda: client.post(url, payload, format="json")
+
+    def measure(self, endpoint, fixtures):
+        clear_caches()
+        self.prepare(endpoint, fixtures)()
+
+        timings = []
+        queries = 0
+        for _ in range(REPEAT):
+            send = self.prepare(endpoint, fixtures)
+            clear_caches()
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = send()
+                timings.append((time.perf_counter() - started) * 1000)
+            self.assertLess(
+                response.status_code,
+                300,
+                f"{endpoint.name} {endpoint.action}: {response.content!r}",
+            )
+            queries = max(queries, len(captured))
+
+        send = self.prepare(endpoint, fixtures)
+        clear_caches()
+        tracemalloc.start()
+        send()
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        return {
+            "queries": queries,
+            "p50_ms": round(percentile(timings, 0.5), 3),
+            "p95_ms": round(percentile(timings, 0.95), 3),
+            "peak_memory_kib": round(peak_memory / 1024, 1),
+        }
+
+    def test_endpoints(self):
+        endpoints = [*router_endpoints(), *USER_ENDPOINTS]
+        results = []
+        for scale_name in SCALE_NAMES:
+            scale = SCALES[scale_name]
+            seed(scale)
+            fixtures = Fixtures.load()
+            for endpoint in endpoints:
+                results.append(
+                    {
+                        "endpoint": endpoint.name,
+                        "action": endpoint.action,
+                        "scale": scale_name,
+                        **scale._asdict(),
+                        **self.measure(endpoint, fixtures),
+                    }
+                )
+
+        with open(OUTPUT, "w") as output:
+            json.dump(
+                {"database": connection.vendor, "results": results},
+                output,
+                indent=2,
+            )
+
+        query_counts = {}
+        for result in results:
+            query_counts.setdefault(
+                (result["endpoint"], result["action"]), {}
+            )[result["scale"]] = result["queries"]
+        growing = {
+            f"{endpoint} {action}": counts
+            for (endpoint, action), counts in query_counts.items()
+            if len(set(counts.values())) > 1
+        }
+        self.assertEqual(growing, {}, "Query counts depend on dataset size")
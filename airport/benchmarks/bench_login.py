@@ -0,0 +1,130 @@
+import json
+import os
+import statistics
+import threading
+import time
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import caches
+from django.db import close_old_connections, connection
+from django.test import TransactionTestCase, override_settings
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.views import TokenObtainPairView
+
+from airport.benchmarks.datasets import Scale, seed
+from airport.benchmarks.bench_endpoints import PASSWORD, percentile
+from user.executors import BoundedExecutor, offload
+
+LOGIN_THREADS = int(os.environ.get("BENCHMARK_LOGIN_THREADS", "16"))
+REQUESTS = int(os.environ.get("BENCHMARK_LOGIN_REQUESTS", "200"))
+OUTPUT = os.environ.get(
+    "BENCHMARK_LOGIN_OUTPUT", "benchmark-login-results.json"
+)
+WORKERS = 2
+QUEUE = 2
+SCALE = Scale(airports=20, flights=200, tickets=2_000)
+
+TOKEN_URL = reverse("user:token_obtain_pair")
+
+
+@override_settings(
+    REST_FRAMEWORK={**settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_RATES": {}}
+)
+class LoginStormBenchmark(TransactionTestCase):
+    """
+    Latency of the flight list while LOGIN_THREADS threads keep
+    obtaining tokens, with the token view on the request thread and
+    offloaded to a bounded executor, written to BENCHMARK_LOGIN_OUTPUT.
+
+    Run with:
+        python manage.py test airport.benchmarks --pattern "bench_login.py"
+    """
+
+    def setUp(self):
+        seed(SCALE)
+        get_user_model().objects.update(password=make_password(PASSWORD))
+        self.users = list(
+            get_user_model().objects.values_list("email", flat=True)
+        )
+        user = get_user_model().objects.earliest("pk")
+        self.token = str(RefreshToken.for_user(user).access_token)
+        self.factory = APIRequestFactory()
+
+    def log_in(self, view, stop, statuses):
+        try:
+            number = 0
+            while not stop.is_set():
+                close_old_connections()
+                request = self.factory.post(
+                    TOKEN_URL,
+                    {
+                        "email": self.users[number % len(self.users)],
+                        "password": PASSWORD,
+                    },
+                )
+                response = view(request)
+                statuses.append(response.status_code)
+                number += 1
+        finally:
+            connection.close()
+
+    def flight_list_timings(self, view):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.token}")
+        url = reverse("airport:flights-list")
+        stop = threading.Event()
+        statuses = []
+        storm = [
+            threading.Thread(target=self.log_in, args=(view, stop, statuses))
+            for _ in range(LOGIN_THREADS)
+        ]
+        caches["default"].clear()
+        client.get(url)
+        for thread in storm:
+            thread.start()
+
+        timings = []
+        try:
+            for _ in range(REQUESTS):
+                started = time.perf_counter()
+                response = client.get(url)
+                timings.append((time.perf_counter() - started) * 1000)
+                self.assertEqual(response.status_code, 200)
+        finally:
+            stop.set()
+            for thread in storm:
+                thread.join()
+        return timings, statuses
+
+    def test_login_storm(self):
+        modes = {
+            "request thread": TokenObtainPairView.as_view(),
+            "bounded executor": async_to_sync(
+                offload(
+                    TokenObtainPairView.as_view(),
+                    BoundedExecutor(WORKERS, QUEUE, "benchmark-hashing"),
+                )
+            ),
+        }
+        results = []
+        for name, view in modes.items():
+            timings, statuses = self.flight_list_timings(view)
+            results.append(
+                {
+                    "mode": name,
+                    "login_threads": LOGIN_THREADS,
+                    "flight_list_p50_ms": round(statistics.median(timings), 2),
+                    "flight_list_p95_ms": round(percentile(timings, 0.95), 2),
+                    "logins": statuses.count(200),
+                    "rejected_logins": statuses.count(503),
+                }
+            )
+            self.assertEqual(set(statuses) - {200, 503}, set())
+
+        with open(OUTPUT, "w") as output:
+            json.dump({"results": results}, output, indent=2)
@@ -0,0 +1,144 @@
+import json
+import os
+import threading
+import time
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import close_old_connections, connection, connections
+from django.test import TransactionTestCase, override_settings
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from airport.benchmarks.datasets import Scale, seed
+from airport.models import Flight
+from airport.pools import pool_metrics
+
+CONCURRENCY = [
+    int(threads)
+    for threads in os.environ.get("BENCHMARK_CONCURRENCY", "1,8").split(",")
+]
+REQUESTS = int(os.environ.get("BENCHMARK_POOL_REQUESTS", "400"))
+OUTPUT = os.environ.get("BENCHMARK_POOL_OUTPUT", "benchmark-pool-results.json")
+POOL = {"min_size": 2, "max_size": 8, "timeout": 10}
+SCALE = Scale(airports=20, flights=200, tickets=2_000)
+
+# settings of the default database compared by the benchmark
+MODES = {
+    "connection per request": {"CONN_MAX_AGE": 0, "OPTIONS": {}},
+    "persistent connections": {"CONN_MAX_AGE": 60, "OPTIONS": {}},
+    "pool": {"CONN_MAX_AGE": 0, "OPTIONS": {"pool": POOL}},
+}
+
+
+def pool_supported() -> bool:
+    if connection.vendor != "postgresql":
+        return False
+    try:
+        import psycopg_pool  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+@skipUnless(pool_supported(), "Needs PostgreSQL with psycopg_pool")
+@override_settings(
+    REST_FRAMEWORK={**settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_RATES": {}}
+)
+class ConnectionPoolBenchmark(TransactionTestCase):
+    """
+    Requests per second of short endpoints with a new connection per
+    request, persistent connections and a psycopg pool, from several
+    threads at once, written to BENCHMARK_POOL_OUTPUT.
+
+    Run with:
+        python manage.py test airport.benchmarks --pattern "bench_pool.py"
+    """
+
+    def setUp(self):
+        seed(SCALE)
+        user = get_user_model().objects.earliest("pk")
+        self.token = str(RefreshToken.for_user(user).access_token)
+        self.urls = [
+            reverse(
+                "airport:flights-detail",
+                args=[Flight.objects.earliest("pk").pk],
+            ),
+            reverse("airport:routes-list"),
+        ]
+        self.original = {
+            key: connection.settings_dict[key] for key in MODES["pool"]
+        }
+
+    def tearDown(self):
+        self.use_mode(self.original)
+
+    def use_mode(self, mode):
+        connections.close_all()
+        if connection.settings_dict["OPTIONS"].get("pool"):
+            connection.close_pool()
+        # connections of every thread share this settings dict
+        connection.settings_dict.update(mode)
+
+    def send_requests(self, count, errors):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.token}")
+        try:
+            for number in range(count):
+                # what request_started and request_finished do outside
+                # of the test client
+                close_old_connections()
+                response = client.get(self.urls[number % len(self.urls)])
+                close_old_connections()
+                if response.status_code != 200:
+                    errors.append(response.status_code)
+        finally:
+            connection.close()
+
+    def requests_per_second(self, threads) -> float:
+        caches["default"].clear()
+        errors = []
+        workers = [
+            threading.Thread(
+                target=self.send_requests, args=(REQUESTS // threads, errors)
+            )
+            for _ in range(threads)
+        ]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(errors, [])
+        return REQUESTS // threads * threads / elapsed
+
+    def test_connection_pool(self):
+        results = []
+        for name, mode in MODES.items():
+            self.use_mode(mode)
+            for threads in CONCURRENCY:
+                result = {
+                    "mode": name,
+                    "threads": threads,
+                    "requests": REQUESTS // threads * threads,
+                    "requests_per_second": round(
+                        self.requests_per_second(threads), 1
+                    ),
+                }
+                if mode["OPTIONS"]:
+                    result["pool"] = pool_metrics(
+                        "default", connection.pool.get_stats()
+                    )
+                    self.assertLessEqual(
+                        result["pool"]["connections_opened"],
+                        POOL["max_size"],
+                    )
+                results.append(result)
+
+        with open(OUTPUT, "w") as output:
+            json.dump({"results": results}, output, indent=2)
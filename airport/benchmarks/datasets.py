@@ -0,0 +1,38 @@
+from io import StringIO
+from typing import NamedTuple
+
+from django.core.management import call_command
+
+from airport.models import Airport, Flight, Ticket
+
+
+class Scale(NamedTuple):
+    airports: int
+    flights: int
+    tickets: int
+
+
+SCALES = {
+    "small": Scale(airports=50, flights=1_000, tickets=20_000),
+    "medium": Scale(airports=200, flights=5_000, tickets=100_000),
+    "large": Scale(airports=1_000, flights=50_000, tickets=1_000_000),
+}
+
+
+def seed(scale: Scale):
+    """
+    Grow the database to `scale` with generate_data, so seeding a larger
+    scale keeps the rows of a smaller one.
+    """
+    flights = scale.flights - Flight.objects.count()
+    if flights < 1:
+        return
+    call_command(
+        "generate_data",
+        airports=max(2, scale.airports - Airport.objects.count()),
+        flights=flights,
+        tickets=max(0, scale.tickets - Ticket.objects.count()),
+        # rows inserted by worker processes would outlive the test
+        workers=1,
+        stdout=StringIO(),
+    )
@@ -0,0 +1,235 @@
+import hashlib
+import threading
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from rest_framework.response import Response
+
+
+def shared_cache():
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def version_key(model) -> str:
+    return f"airport:version:{model._meta.label_lower}"
+
+
+def model_versions(models) -> list[str]:
+    """
+    Tokens of the current contents of the model tables, read from the
+    shared cache in one round trip. A missing token is created, so a
+    cache eviction can only make the callers reload their data.
+    """
+    keys = [version_key(model) for model in models]
+    versions = shared_cache().get_many(keys)
+
+    for key in keys:
+        if key not in versions:
+            shared_cache().add(key, uuid.uuid4().hex, None)
+            versions[key] = shared_cache().get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_model_version(model) -> str:
+    """Mark the data of `model` as changed for every process."""
+    version = uuid.uuid4().hex
+    shared_cache().set(version_key(model), version, None)
+    return version
+
+
+class LRUCache:
+    """Thread-safe in-process cache holding at most `max_size` entries."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.entries:
+                return None
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class ResponseCache:
+    """
+    Read-through cache of response data: an in-process LRU in front of
+    the shared cache. Keys contain the versions of the models the data
+    was built from, so a write to any of them makes old entries unused.
+    """
+
+    def __init__(self, local_size: int):
+        self.local = LRUCache(local_size)
+
+    def key(self, models, path: str) -> str:
+        versions = ":".join(model_versions(models))
+        digest = hashlib.md5(
+            f"{versions}:{path}".encode(), usedforsecurity=False
+        ).hexdigest()
+        return f"airport:response:{digest}"
+
+    def get(self, key):
+        data = self.local.get(key)
+        if data is None:
+            data = shared_cache().get(key)
+            if data is not None:
+                self.local.set(key, data)
+        return data
+
+    def set(self, key, data):
+        self.local.set(key, data)
+        shared_cache().set(key, data, settings.RESPONSE_CACHE_TIMEOUT)
+
+
+response_cache = ResponseCache(settings.RESPONSE_CACHE_LOCAL_SIZE)
+
+
+VALIDATOR_HEADERS = ("ETag", "Last-Modified")
+
+
+def not_modified_response(request, headers):
+    """
+    Return 304 Not Modified if the client's copy matches the validator
+    `headers` of a response, else None.
+    """
+    last_modified = headers.get("Last-Modified")
+    not_modified = get_conditional_response(
+        request,
+        etag=headers.get("ETag"),
+        last_modified=last_modified and parse_http_date_safe(last_modified),
+    )
+    if not_modified is not None:
+        for header, value in headers.items():
+            not_modified[header] = value
+    return not_modified
+
+
+class CachedResponseMixin:
+    """
+    Serve list and retrieve responses from `response_cache`.
+    `cache_models` lists every model the serializers read.
+
+    Validator headers are cached with the data, so with
+    `ConditionalGetMixin` after this mixin a cache hit answers
+    conditional requests without touching the database.
+    """
+
+    cache_models = ()
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        key = response_cache.key(
+            self.cache_models,
+            f"{type(self).__name__}:{self.action}:"
+            f"{request.build_absolute_uri()}",
+        )
+        cached = response_cache.get(key)
+        if cached is not None:
+            data, headers = cached
+            not_modified = not_modified_response(request, headers)
+            if not_modified is not None:
+                return not_modified
+            return Response(data, headers=headers)
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            headers = {
+                header: response[header]
+                for header in VALIDATOR_HEADERS
+                if response.has_header(header)
+            }
+            response_cache.set(key, (response.data, headers))
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+
+class ConditionalGetMixin:
+    """
+    Answer list and retrieve requests with ETag and Last-Modified, and
+    with 304 Not Modified when the client's copy is current, before any
+    serializer runs.
+
+    The state of a response is the newest `updated_at` and the number of
+    the objects it shows, plus the versions of `cache_models`, which
+    cover changes of nested objects.
+    """
+
+    cache_models = ()
+
+    def conditional_response(self, handler, state, request, *args, **kwargs):
+        last_modified, count = state
+        versions = ":".join(model_versions(self.cache_models))
+        state_key = f"{request.get_full_path()}:{last_modified}:{count}"
+        etag = quote_etag(
+            hashlib.md5(
+                f"{state_key}:{versions}".encode(), usedforsecurity=False
+            ).hexdigest()
+        )
+        headers = {"ETag": etag}
+        if last_modified is not None:
+            headers["Last-Modified"] = http_date(last_modified.timestamp())
+
+        not_modified = not_modified_response(request, headers)
+        if not_modified is not None:
+            return not_modified
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            for header, value in headers.items():
+                response[header] = value
+        return response
+
+    def list(self, request, *args, **kwargs):
+        state = (
+            self.filter_queryset(self.get_queryset())
+            .order_by()
+            .aggregate(last_modified=Max("updated_at"), count=Count("id"))
+        )
+        return self.conditional_response(
+            super().list,
+            (state["last_modified"], state["count"]),
+            request,
+            *args,
+            **kwargs,
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        last_modified = (
+            self.filter_queryset(self.get_queryset())
+            .filter(**{self.lookup_field: kwargs[lookup_url_kwarg]})
+            .values_list("updated_at", flat=True)
+            .first()
+        )
+        if last_modified is None:
+            return super().retrieve(request, *args, **kwargs)
+
+        return self.conditional_response(
+            super().retrieve, (last_modified, 1), request, *args, **kwargs
+        )
@@ -0,0 +1,47 @@
+from django.core import checks
+
+from airport.prefetch import PlannedQuerysetMixin, lazy_loads, serializer_plan
+
+
+@checks.register()
+def check_serializer_relations(app_configs, **kwargs):
+    """
+    Warn about list and retrieve serializers of the airport API that
+    would load relations one object at a time.
+    """
+    from airport.urls import router
+
+    warnings = []
+    for prefix, viewset, basename in router.registry:
+        for action in ("list", "retrieve"):
+            view = viewset(action=action, request=None, format_kwarg=None)
+            serializer_class = view.get_serializer_class()
+            plan = serializer_plan(serializer_class)
+
+            for name in plan.unresolved:
+                warning = checks.Warning(
+                    f"{serializer_class.__name__}.{name} reads attributes "
+                    "whose relations cannot be planned.",
+                    hint="Declare the relations that model methods and "
+                    "properties read with @uses_relations.",
+                    obj=serializer_class,
+                    id="airport.W001",
+                )
+                if warning not in warnings:
+                    warnings.append(warning)
+
+            if isinstance(view, PlannedQuerysetMixin):
+                continue
+            for lookup in lazy_loads(view.queryset, plan.relations):
+                warnings.append(
+                    checks.Warning(
+                        f"{serializer_class.__name__} reads {lookup!r}, "
+                        f"which the {action} queryset loads lazily.",
+                        hint="Add PlannedQuerysetMixin to the viewset or "
+                        "load the relation in its queryset.",
+                        obj=viewset,
+                        id="airport.W002",
+                    )
+                )
+
+    return warnings
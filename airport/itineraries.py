@@ -0,0 +1,270 @@
+import threading
+from bisect import bisect_left, bisect_right
+from collections import defaultdict, deque
+from datetime import datetime, timedelta
+from typing import NamedTuple
+
+from django.db import DEFAULT_DB_ALIAS
+
+from airport.cache import bump_model_version, model_versions
+from airport.models import Flight, Route
+
+INDEX_MODELS = (Flight, Route)
+
+
+class Leg(NamedTuple):
+    departure_time: datetime
+    arrival_time: datetime
+    flight_id: int
+    route_id: int
+    source_id: int
+    destination_id: int
+
+
+to_datetime = Flight._meta.get_field("departure_time").to_python
+
+
+class FlightIndex:
+    """
+    In-memory schedule used to search connecting flights without
+    querying the database for every hop.
+
+    Routes are kept as an adjacency map of airports, flights as lists
+    sorted by departure time per route. The index is loaded for the
+    flight and route table versions in the shared cache, so it is
+    loaded again once another process changed them. Changes committed
+    by this process are applied in place.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.built = False
+        self.version = None
+
+    def invalidate(self):
+        """Drop the index, it will be loaded again on the next search."""
+        with self.lock:
+            self.built = False
+
+    def commit(self, model, change, *args):
+        """
+        Apply a committed change of a flight or route and mark `model`
+        as changed for every process. When nothing else changed since
+        the index was loaded, it keeps up without loading again.
+        """
+        with self.lock:
+            current = self.built and (
+                model_versions(INDEX_MODELS) == self.version
+            )
+            version = bump_model_version(model)
+            if not current:
+                self.built = False
+                return
+            change(*args)
+            self.version = [
+                version if index_model is model else index_version
+                for index_model, index_version in zip(
+                    INDEX_MODELS, self.version
+                )
+            ]
+
+    def build(self, version):
+        with self.lock:
+            self.routes_from = defaultdict(dict)
+            self.routes_to = defaultdict(set)
+            self.route_ends = {}
+            self.departures = defaultdict(list)
+            self.legs = defaultdict(list)
+            self.flight_routes = {}
+
+            # the index outlives the request, a lagging replica would
+            # keep it stale until the next change
+            for route in Route.objects.using(DEFAULT_DB_ALIAS).values_list(
+                "id", "source_id", "destination_id"
+            ):
+                self._add_route(*route)
+
+            for flight_id, route_id, departure, arrival in (
+                Flight.objects.using(DEFAULT_DB_ALIAS)
+                .order_by("route_id", "departure_time")
+                .values_list(
+                    "id", "route_id", "departure_time", "arrival_time"
+                )
+                .iterator(chunk_size=5000)
+            ):
+                source_id, destination_id = self.route_ends[route_id]
+                self.departures[route_id].append(departure)
+                self.legs[route_id].append(
+                    Leg(
+                        departure,
+                        arrival,
+                        flight_id,
+                        route_id,
+                        source_id,
+                        destination_id,
+                    )
+                )
+                self.flight_routes[flight_id] = route_id
+
+            self.built = True
+            self.version = version
+
+    def _add_route(self, route_id, source_id, destination_id):
+        self.route_ends[route_id] = (source_id, destination_id)
+        self.routes_from[source_id][route_id] = destination_id
+        self.routes_to[destination_id].add(source_id)
+
+    def _remove_route(self, route_id):
+        source_id, destination_id = self.route_ends.pop(route_id)
+        del self.routes_from[source_id][route_id]
+        if destination_id not in self.routes_from[source_id].values():
+            self.routes_to[destination_id].discard(source_id)
+
+    def _remove_flight(self, flight_id):
+        route_id = self.flight_routes.pop(flight_id, None)
+        if route_id is None:
+            return
+
+        legs = self.legs[route_id]
+        position = next(
+            i for i, leg in enumerate(legs) if leg.flight_id == flight_id
+        )
+        del legs[position]
+        del self.departures[route_id][position]
+
+    def update_route(self, route):
+        with self.lock:
+            if not self.built:
+                return
+            if route.id in self.route_ends:
+                self._remove_route(route.id)
+            self._add_route(route.id, route.source_id, route.destination_id)
+            self.legs[route.id] = [
+                leg._replace(
+                    source_id=route.source_id,
+                    destination_id=route.destination_id,
+                )
+                for leg in self.legs[route.id]
+            ]
+
+    def remove_route(self, route_id):
+        with self.lock:
+            if not self.built or route_id not in self.route_ends:
+                return
+            self._remove_route(route_id)
+            for leg in self.legs.pop(route_id, ()):
+                self.flight_routes.pop(leg.flight_id, None)
+            self.departures.pop(route_id, None)
+
+    def update_flight(self, flight):
+        with self.lock:
+            if not self.built:
+                return
+            self._remove_flight(flight.id)
+            if flight.route_id not in self.route_ends:
+                # the route was saved without signals, e.g. in bulk
+                self.built = False
+                return
+            source_id, destination_id = self.route_ends[flight.route_id]
+            # times may still be the strings the flight was created with
+            departure_time = to_datetime(flight.departure_time)
+            leg = Leg(
+                departure_time,
+                to_datetime(flight.arrival_time),
+                flight.id,
+                flight.route_id,
+                source_id,
+                destination_id,
+            )
+            departures = self.departures[flight.route_id]
+            position = bisect_right(departures, departure_time)
+            departures.insert(position, departure_time)
+            self.legs[flight.route_id].insert(position, leg)
+            self.flight_routes[flight.id] = flight.route_id
+
+    def remove_flight(self, flight_id):
+        with self.lock:
+            if self.built:
+                self._remove_flight(flight_id)
+
+    def _hops_to(self, destination_id, max_hops):
+        """Fewest flights needed to reach the destination from airports."""
+        hops = {destination_id: 0}
+        queue = deque([destination_id])
+        while queue:
+            airport_id = queue.popleft()
+            if hops[airport_id] == max_hops:
+                continue
+            for source_id in self.routes_to[airport_id]:
+                if source_id not in hops:
+                    hops[source_id] = hops[airport_id] + 1
+                    queue.append(source_id)
+        return hops
+
+    def search(
+        self,
+        source_id: int,
+        destination_id: int,
+        departure_after: datetime,
+        departure_before: datetime,
+        max_connections: int = 1,
+        min_layover: timedelta = timedelta(hours=1),
+        max_layover: timedelta = timedelta(hours=12),
+        limit: int = 10,
+    ) -> list[list[Leg]]:
+        """
+        Find itineraries from one airport to another, first departing
+        within the given window, with at most `max_connections` changes.
+        Itineraries arriving earliest, then with fewer legs, come first.
+        """
+        version = model_versions(INDEX_MODELS)
+        with self.lock:
+            if not self.built or version != self.version:
+                self.build(version)
+
+            max_legs = max_connections + 1
+            hops_to = self._hops_to(destination_id, max_legs)
+            itineraries = []
+
+            def extend(airport_id, earliest, latest, path, visited):
+                legs_left = max_legs - len(path) - 1
+                for route_id, next_airport_id in self.routes_from[
+                    airport_id
+                ].items():
+                    if next_airport_id in visited:
+                        continue
+                    if hops_to.get(next_airport_id, max_legs + 1) > legs_left:
+                        continue
+
+                    departures = self.departures[route_id]
+                    legs = self.legs[route_id]
+                    for position in range(
+                        bisect_left(departures, earliest),
+                        bisect_right(departures, latest),
+                    ):
+                        leg = legs[position]
+                        if next_airport_id == destination_id:
+                            itineraries.append(path + [leg])
+                        else:
+                            extend(
+                                next_airport_id,
+                                leg.arrival_time + min_layover,
+                                leg.arrival_time + max_layover,
+                                path + [leg],
+                                visited | {next_airport_id},
+                            )
+
+            if source_id != destination_id:
+                extend(
+                    source_id,
+                    departure_after,
+                    departure_before,
+                    [],
+                    {source_id},
+                )
+
+        itineraries.sort(key=lambda legs: (legs[-1].arrival_time, len(legs)))
+        return itineraries[:limit]
+
+
+flight_index = FlightIndex()
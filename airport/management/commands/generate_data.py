@@ -0,0 +1,513 @@
+import multiprocessing
+import os
+import random
+from datetime import datetime, time, timedelta, timezone
+from itertools import islice
+from typing import NamedTuple
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+from django.db.models import Max
+
+from airport.cache import bump_model_version
+from airport.itineraries import flight_index
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Crew,
+    Flight,
+    Order,
+    Route,
+    Ticket,
+)
+from airport.pools import close_pools
+
+CITIES = (
+    "Kyiv",
+    "Lviv",
+    "Odesa",
+    "Warsaw",
+    "Krakow",
+    "Berlin",
+    "Munich",
+    "Paris",
+    "Lyon",
+    "London",
+    "Manchester",
+    "Madrid",
+    "Barcelona",
+    "Rome",
+    "Milan",
+    "Vienna",
+    "Prague",
+    "Budapest",
+    "Amsterdam",
+    "Brussels",
+    "Copenhagen",
+    "Stockholm",
+    "Oslo",
+    "Helsinki",
+    "Lisbon",
+    "Athens",
+    "Istanbul",
+    "Dubai",
+    "New York",
+    "Chicago",
+    "Toronto",
+    "Tokyo",
+    "Seoul",
+    "Singapore",
+    "Sydney",
+)
+AIRPLANE_TYPES = (
+    "Airbus A220",
+    "Airbus A320",
+    "Airbus A321",
+    "Airbus A350",
+    "Boeing 737",
+    "Boeing 777",
+    "Boeing 787",
+    "Embraer E195",
+)
+FIRST_NAMES = (
+    "Olena",
+    "Andrii",
+    "Maria",
+    "Taras",
+    "Iryna",
+    "Oleh",
+    "Sofia",
+    "Dmytro",
+    "Anna",
+    "Maksym",
+)
+LAST_NAMES = (
+    "Shevchenko",
+    "Kovalenko",
+    "Bondarenko",
+    "Tkachenko",
+    "Kravchenko",
+    "Melnyk",
+    "Boiko",
+    "Koval",
+    "Moroz",
+    "Lysenko",
+)
+MIN_ROWS, MAX_ROWS = 20, 40
+MIN_SEATS_IN_ROW, MAX_SEATS_IN_ROW = 4, 8
+ROUTES_PER_AIRPORT = 5
+CREW_PER_FLIGHT = (2, 4)
+FLIGHTS_PER_AIRPLANE = 200
+CREW_PER_AIRPLANE = 6
+TICKETS_PER_ORDER = 4
+ORDERS_PER_USER = 20
+CRUISE_SPEED = 800
+SCHEDULE_DAYS = 365
+
+User = get_user_model()
+
+# columns written for each table, by attribute name
+COLUMNS = {
+    User: (
+        "id",
+        "password",
+        "is_superuser",
+        "email",
+        "first_name",
+        "last_name",
+        "is_staff",
+        "is_active",
+        "date_joined",
+    ),
+    AirplaneType: ("id", "name", "updated_at"),
+    Airplane: (
+        "id",
+        "name",
+        "rows",
+        "seats_in_row",
+        "airplane_type_id",
+        "updated_at",
+    ),
+    Airport: ("id", "name", "closest_big_city", "updated_at"),
+    Crew: ("id", "first_name", "last_name", "updated_at"),
+    Route: ("id", "source_id", "destination_id", "distance", "updated_at"),
+    Flight: (
+        "id",
+        "route_id",
+        "airplane_id",
+        "departure_time",
+        "arrival_time",
+        "tickets_sold",
+        "updated_at",
+    ),
+    Flight.crew.through: ("flight_id", "crew_id"),
+    Order: ("id", "created_at", "updated_at", "user_id"),
+    Ticket: ("id", "row", "seat", "flight_id", "order_id", "updated_at"),
+}
+
+
+class Plan(NamedTuple):
+    """
+    What to generate. Rows get explicit primary keys counted from
+    `first_ids`, so any process can build any range of rows.
+    """
+
+    seed: int
+    chunk_size: int
+    now: datetime
+    counts: dict
+    first_ids: dict
+    routes: list
+
+    @property
+    def tickets_per_flight(self) -> int:
+        return -(-self.counts[Ticket] // self.counts[Flight])
+
+
+def chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def copy_supported() -> bool:
+    if connection.vendor != "postgresql":
+        return False
+
+    from django.db.backends.postgresql.psycopg_any import is_psycopg3
+
+    return is_psycopg3
+
+
+def insert(model, rows, chunk_size):
+    """
+    Insert tuples of `COLUMNS[model]` in chunks, with COPY on Postgres
+    with psycopg 3 and bulk_create elsewhere.
+    """
+    fields = COLUMNS[model]
+    copy = copy_supported()
+    for chunk in chunks(rows, chunk_size):
+        if copy:
+            columns = ", ".join(
+                connection.ops.quote_name(model._meta.get_field(name).column)
+                for name in fields
+            )
+            table = connection.ops.quote_name(model._meta.db_table)
+            with transaction.atomic(), connection.cursor() as cursor:
+                with cursor.cursor.copy(
+                    f"COPY {table} ({columns}) FROM STDIN"
+                ) as writer:
+                    for row in chunk:
+                        writer.write_row(row)
+        else:
+            model.objects.bulk_create(
+                model(**dict(zip(fields, row))) for row in chunk
+            )
+
+
+def rng(plan, kind, start):
+    return random.Random(f"{plan.seed}:{kind}:{start}")
+
+
+def user_rows(plan, start, stop):
+    password = make_password(None)
+    for index in range(start, stop):
+        user_id = plan.first_ids[User] + index
+        yield (
+            user_id,
+            password,
+            False,
+            f"passenger{user_id}@example.com",
+            FIRST_NAMES[index % len(FIRST_NAMES)],
+            LAST_NAMES[index // len(FIRST_NAMES) % len(LAST_NAMES)],
+            False,
+            True,
+            plan.now,
+        )
+
+
+def airplane_rows(plan, start, stop):
+    generator = rng(plan, "airplanes", start)
+    for index in range(start, stop):
+        yield (
+            plan.first_ids[Airplane] + index,
+            f"UR-{index:05d}",
+            generator.randint(MIN_ROWS, MAX_ROWS),
+            generator.randint(MIN_SEATS_IN_ROW, MAX_SEATS_IN_ROW),
+            plan.first_ids[AirplaneType] + index % plan.counts[AirplaneType],
+            plan.now,
+        )
+
+
+def airport_rows(plan, start, stop):
+    # numbered by primary key, so names stay unique across runs
+    for airport_id in range(
+        plan.first_ids[Airport] + start, plan.first_ids[Airport] + stop
+    ):
+        city = CITIES[(airport_id - 1) % len(CITIES)]
+        number = (airport_id - 1) // len(CITIES)
+        yield (
+            airport_id,
+            f"{city} Airport {number + 1}" if number else f"{city} Airport",
+            city,
+            plan.now,
+        )
+
+
+def crew_rows(plan, start, stop):
+    generator = rng(plan, "crew", start)
+    for index in range(start, stop):
+        yield (
+            plan.first_ids[Crew] + index,
+            generator.choice(FIRST_NAMES),
+            generator.choice(LAST_NAMES),
+            plan.now,
+        )
+
+
+def route_rows(plan, start, stop):
+    for index in range(start, stop):
+        source, destination, distance = plan.routes[index]
+        yield (
+            plan.first_ids[Route] + index,
+            plan.first_ids[Airport] + source,
+            plan.first_ids[Airport] + destination,
+            distance,
+            plan.now,
+        )
+
+
+def flight_rows(plan, start, stop):
+    generator = rng(plan, "flights", start)
+    first_departure = datetime.combine(
+        plan.now.date(), time.min, tzinfo=timezone.utc
+    )
+    for index in range(start, stop):
+        route = generator.randrange(len(plan.routes))
+        departure_time = first_departure + timedelta(
+            minutes=5 * generator.randrange(SCHEDULE_DAYS * 24 * 12)
+        )
+        duration = timedelta(hours=plan.routes[route][2] / CRUISE_SPEED)
+        tickets_sold = min(
+            plan.tickets_per_flight,
+            max(0, plan.counts[Ticket] - index * plan.tickets_per_flight),
+        )
+        yield (
+            plan.first_ids[Flight] + index,
+            plan.first_ids[Route] + route,
+            plan.first_ids[Airplane]
+            + generator.randrange(plan.counts[Airplane]),
+            departure_time,
+            departure_time + duration,
+            tickets_sold,
+            plan.now,
+        )
+
+
+def flight_crew_rows(plan, start, stop):
+    generator = rng(plan, "flight_crew", start)
+    for index in range(start, stop):
+        for crew in generator.sample(
+            range(plan.counts[Crew]), generator.randint(*CREW_PER_FLIGHT)
+        ):
+            yield plan.first_ids[Flight] + index, plan.first_ids[Crew] + crew
+
+
+def order_rows(plan, start, stop):
+    for index in range(start, stop):
+        yield (
+            plan.first_ids[Order] + index,
+            plan.now,
+            plan.now,
+            plan.first_ids[User] + index // ORDERS_PER_USER,
+        )
+
+
+def ticket_rows(plan, start, stop):
+    for index in range(start, stop):
+        # seats are taken row by row, and every airplane has at least
+        # MIN_ROWS * MIN_SEATS_IN_ROW of them
+        flight, position = divmod(index, plan.tickets_per_flight)
+        yield (
+            plan.first_ids[Ticket] + index,
+            position // MIN_SEATS_IN_ROW + 1,
+            position % MIN_SEATS_IN_ROW + 1,
+            plan.first_ids[Flight] + flight,
+            plan.first_ids[Order] + index // TICKETS_PER_ORDER,
+            plan.now,
+        )
+
+
+# parallel stages, run one after another so that foreign keys exist
+STAGES = (
+    (
+        (User, user_rows),
+        (Airplane, airplane_rows),
+        (Airport, airport_rows),
+        (Crew, crew_rows),
+    ),
+    ((Route, route_rows), (Order, order_rows)),
+    ((Flight, flight_rows),),
+    ((Flight.crew.through, flight_crew_rows), (Ticket, ticket_rows)),
+)
+
+worker_plan = None
+
+
+def use_plan(plan):
+    global worker_plan
+    worker_plan = plan
+
+
+def start_worker(plan):
+    use_plan(plan)
+    # connections inherited from the parent process must not be shared
+    connections.close_all()
+    close_pools()
+
+
+def generate(task):
+    # tasks point into STAGES, as auto-created models cannot be pickled
+    stage, step, start, stop = task
+    model, build = STAGES[stage][step]
+    insert(model, build(worker_plan, start, stop), worker_plan.chunk_size)
+    return stop - start
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate airports, routes, airplanes, crews, flights, orders and "
+        "tickets for load testing"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--airports", type=int, default=100)
+        parser.add_argument("--flights", type=int, default=10_000)
+        parser.add_argument("--tickets", type=int, default=100_000)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count(),
+            help="Processes inserting rows, one on SQLite.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=20_000,
+            help="Rows built and inserted at a time by each process.",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        airports = options["airports"]
+        flights = options["flights"]
+        tickets = options["tickets"]
+        if airports < 2 or flights < 1 or tickets < 0:
+            raise CommandError(
+                "Generate at least 2 airports and 1 flight, "
+                "and no negative number of tickets"
+            )
+        if -(-tickets // flights) > MIN_ROWS * MIN_SEATS_IN_ROW:
+            raise CommandError(
+                f"At most {MIN_ROWS * MIN_SEATS_IN_ROW} tickets fit on a "
+                "flight, generate more flights"
+            )
+
+        orders = -(-tickets // TICKETS_PER_ORDER)
+        airplanes = max(10, flights // FLIGHTS_PER_AIRPLANE)
+        counts = {
+            User: -(-orders // ORDERS_PER_USER),
+            AirplaneType: len(AIRPLANE_TYPES),
+            Airplane: airplanes,
+            Airport: airports,
+            Crew: airplanes * CREW_PER_AIRPLANE,
+            Flight: flights,
+            Flight.crew.through: flights,
+            Order: orders,
+            Ticket: tickets,
+        }
+        first_ids = {
+            model: (model.objects.aggregate(last=Max("pk"))["last"] or 0) + 1
+            for model in (*counts, Route)
+            if model is not Flight.crew.through
+        }
+
+        generator = random.Random(options["seed"])
+        now = datetime.now(timezone.utc)
+        # destinations are drawn from the other airports, numbered
+        # as if the source were not there
+        routes = [
+            (
+                source,
+                other + (other >= source),
+                generator.randint(200, 12_000),
+            )
+            for source in range(airports)
+            for other in generator.sample(
+                range(airports - 1), min(ROUTES_PER_AIRPORT, airports - 1)
+            )
+        ]
+        counts[Route] = len(routes)
+        plan = Plan(
+            seed=options["seed"],
+            chunk_size=options["chunk_size"],
+            now=now,
+            counts=counts,
+            first_ids=first_ids,
+            routes=routes,
+        )
+
+        insert(
+            AirplaneType,
+            (
+                (first_ids[AirplaneType] + index, name, now)
+                for index, name in enumerate(AIRPLANE_TYPES)
+            ),
+            plan.chunk_size,
+        )
+        workers = 1 if connection.vendor == "sqlite" else options["workers"]
+        for stage in range(len(STAGES)):
+            self.run_stage(plan, stage, workers)
+
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                no_style(), list(first_ids)
+            ):
+                cursor.execute(sql)
+
+        for model in first_ids:
+            bump_model_version(model)
+        flight_index.invalidate()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated {airports} airports, {len(routes)} routes, "
+                f"{flights} flights and {tickets} tickets"
+            )
+        )
+
+    def run_stage(self, plan, stage, workers):
+        tasks = [
+            (stage, step, start, min(start + plan.chunk_size, total))
+            for step, (model, build) in enumerate(STAGES[stage])
+            for total in [plan.counts[model]]
+            for start in range(0, total, plan.chunk_size)
+        ]
+        if workers <= 1:
+            use_plan(plan)
+            for task in tasks:
+                generate(task)
+            return
+
+        connections.close_all()
+        close_pools()
+        with multiprocessing.get_context("fork").Pool(
+            workers, initializer=start_worker, initargs=(plan,)
+        ) as pool:
+            for _ in pool.imap_unordered(generate, tasks):
+                pass
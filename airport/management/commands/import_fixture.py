@@ -0,0 +1,221 @@
+import json
+import re
+from io import StringIO
+from itertools import islice
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.core.serializers.base import DeserializationError
+from django.core.serializers.python import Deserializer
+from django.db import (
+    DEFAULT_DB_ALIAS,
+    IntegrityError,
+    connections,
+    models,
+    transaction,
+)
+
+from airport.cache import bump_model_version
+from airport.itineraries import flight_index
+from airport.models import Flight, Ticket
+
+READ_SIZE = 1 << 16
+SEPARATORS = re.compile(r"[\s,]*")
+
+
+def fixture_objects(stream, read_size=READ_SIZE):
+    """
+    Yield the objects of the JSON array in `stream`, reading it piece
+    by piece instead of loading the whole document.
+    """
+    decoder = json.JSONDecoder()
+    buffer = stream.read(read_size).lstrip()
+    if not buffer.startswith("["):
+        raise CommandError("A fixture must be a JSON array of objects")
+    position = 1
+
+    while True:
+        position = SEPARATORS.match(buffer, position).end()
+        if buffer.startswith("]", position):
+            return
+        try:
+            obj, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            # the next object does not end in the buffer yet
+            chunk = stream.read(read_size)
+            if not chunk:
+                raise CommandError("The fixture ends inside an object")
+            buffer = buffer[position:] + chunk
+            position = 0
+            continue
+        yield obj
+
+
+def dependency_order(model_list):
+    """Sort models so that each follows the models it references."""
+    ordered = []
+
+    def visit(model, path):
+        if model in ordered or model in path:
+            return
+        for field in model._meta.concrete_fields:
+            if field.is_relation and field.related_model in model_list:
+                visit(field.related_model, path | {model})
+        ordered.append(model)
+
+    for model in model_list:
+        visit(model, frozenset())
+    return ordered
+
+
+def fill_timestamps(obj):
+    """Set the auto_now and auto_now_add dates a fixture leaves out."""
+    for field in obj._meta.concrete_fields:
+        if (
+            isinstance(field, models.DateField)
+            and (field.auto_now or field.auto_now_add)
+            and getattr(obj, field.attname) is None
+        ):
+            field.pre_save(obj, add=True)
+
+
+def insert(model, objects, using):
+    """
+    Insert `objects` as they are, like loaddata's raw saves: primary keys
+    and dates from the fixture are kept. Rows of auto-created
+    many-to-many tables get new primary keys.
+    """
+    fields = [
+        field
+        for field in model._meta.local_concrete_fields
+        if not (model._meta.auto_created and field.primary_key)
+    ]
+    batch_size = max(
+        1, connections[using].ops.bulk_batch_size(fields, objects)
+    )
+    iterator = iter(objects)
+    while batch := list(islice(iterator, batch_size)):
+        model._base_manager.using(using)._insert(
+            batch, fields=fields, using=using, raw=True
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        "Import a JSON fixture such as data.json by streaming it and "
+        "inserting its objects in bulk, model by model"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("fixture", help="Path of the JSON fixture.")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Objects of a model kept in memory before inserting them.",
+        )
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help="Database to import into.",
+        )
+        parser.add_argument(
+            "--ignorenonexistent",
+            "-i",
+            action="store_true",
+            help="Ignore fields that no longer exist on the models.",
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        self.using = options["database"]
+        self.batch_size = options["batch_size"]
+        self.pending = {}
+        self.counts = {}
+        connection = connections[self.using]
+
+        try:
+            with open(options["fixture"], encoding="utf-8") as stream:
+                # foreign keys are checked once everything is inserted, so
+                # a full batch is inserted before its references are
+                with transaction.atomic(
+                    using=self.using
+                ), connection.constraint_checks_disabled():
+                    self.read(stream, options["ignorenonexistent"])
+                    for model in dependency_order(list(self.pending)):
+                        self.flush(model)
+                    connection.check_constraints(
+                        table_names=[
+                            model._meta.db_table for model in self.counts
+                        ]
+                    )
+        except (OSError, DeserializationError) as error:
+            raise CommandError(f"Could not import the fixture: {error}")
+        except IntegrityError as error:
+            raise CommandError(
+                f"Could not import the fixture: {error}. "
+                "Import into an empty database."
+            )
+
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                no_style(), list(self.counts)
+            ):
+                cursor.execute(sql)
+
+        if Flight in self.counts or Ticket in self.counts:
+            call_command("rebuild_seat_inventory", stdout=StringIO())
+        for model in self.counts:
+            bump_model_version(model)
+        flight_index.invalidate()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {sum(self.counts.values())} objects: "
+                + ", ".join(
+                    f"{count} {model._meta.label}"
+                    for model, count in self.counts.items()
+                )
+            )
+        )
+
+    def read(self, stream, ignorenonexistent):
+        for deserialized in Deserializer(
+            fixture_objects(stream),
+            using=self.using,
+            ignorenonexistent=ignorenonexistent,
+        ):
+            obj = deserialized.object
+            if obj.pk is None:
+                raise CommandError(
+                    f"{obj._meta.label} objects need a primary key"
+                )
+            fill_timestamps(obj)
+            self.add(obj)
+
+            for name, values in (deserialized.m2m_data or {}).items():
+                field = obj._meta.get_field(name)
+                through = field.remote_field.through
+                for value in values:
+                    self.add(
+                        through(
+                            **{
+                                f"{field.m2m_field_name()}_id": obj.pk,
+                                f"{field.m2m_reverse_field_name()}_id": value,
+                            }
+                        )
+                    )
+
+    def add(self, obj):
+        model = type(obj)
+        pending = self.pending.setdefault(model, [])
+        pending.append(obj)
+        if len(pending) >= self.batch_size:
+            self.flush(model)
+
+    def flush(self, model):
+        objects = self.pending.pop(model, [])
+        if objects:
+            insert(model, objects, self.using)
+            self.counts[model] = self.counts.get(model, 0) + len(objects)
@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Now
+
+from airport.models import Flight, Ticket
+
+
+def counted_tickets():
+    """Subquery counting the tickets of the outer flight."""
+    return Coalesce(
+        Subquery(
+            Ticket.objects.filter(flight=OuterRef("pk"))
+            .order_by()
+            .values("flight")
+            .annotate(count=Count("id"))
+            .values("count")
+        ),
+        Value(0),
+    )
+
+
+class Command(BaseCommand):
+    help = "Rebuild or check Flight.tickets_sold against the Ticket table"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report flights with a wrong counter, change nothing.",
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        mismatched = (
+            Flight.objects.annotate(counted=counted_tickets())
+            .exclude(tickets_sold=F("counted"))
+            .values_list("id", "tickets_sold", "counted")
+        )
+
+        if options["check"]:
+            mismatches = list(mismatched)
+            for flight_id, stored, counted in mismatches:
+                self.stdout.write(
+                    f"Flight {flight_id}: stored {stored}, counted {counted}"
+                )
+            if mismatches:
+                raise CommandError(
+                    f"{len(mismatches)} flight(s) have a wrong seat counter"
+                )
+            self.stdout.write(self.style.SUCCESS("Seat counters are valid!"))
+            return
+
+        with transaction.atomic():
+            updated = (
+                Flight.objects.annotate(counted=counted_tickets())
+                .exclude(tickets_sold=F("counted"))
+                .update(tickets_sold=F("counted"), updated_at=Now())
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Fixed seat counters of {updated} flights")
+        )
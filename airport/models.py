@@ -3,26 +3,32 @@ import uuid
 
 from django.conf import settings
 from django.db import models
+from django.db.models.functions import Greatest, Now
 from django.utils.text import slugify
 from rest_framework.exceptions import ValidationError
 
+from airport.prefetch import uses_relations
+
 
 # 8 models
 # Create your models here.
 class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
         related_name="orders",
     )
 
+    @uses_relations("user")
     def __str__(self):
         return f"Order {self.created_at} by {self.user}"
 
 
 class AirplaneType(models.Model):
     name = models.CharField(max_length=255)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
@@ -31,6 +37,7 @@ class AirplaneType(models.Model):
 class Crew(models.Model):
     first_name = models.CharField(max_length=255)
     last_name = models.CharField(max_length=255)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
@@ -39,6 +46,7 @@ class Crew(models.Model):
 class Airport(models.Model):
     name = models.CharField(max_length=255)
     closest_big_city = models.CharField(max_length=255)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
@@ -52,7 +60,9 @@ class Route(models.Model):
         Airport, on_delete=models.CASCADE, related_name="destination_airport"
     )
     distance = models.IntegerField()
+    updated_at = models.DateTimeField(auto_now=True)
 
+    @uses_relations("source", "destination")
     def __str__(self):
         return f"{self.source} - {self.destination}"
 
@@ -73,7 +83,9 @@ class Airplane(models.Model):
         AirplaneType, on_delete=models.CASCADE, related_name="airplanes"
     )
     image = models.ImageField(upload_to=image_upload, blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
+    @uses_relations("airplane_type")
     def __str__(self):
         return f"{self.airplane_type} {self.name}"
 
@@ -88,7 +100,17 @@ class Flight(models.Model):
     crew = models.ManyToManyField(Crew, related_name="flights")
     departure_time = models.DateTimeField()
     arrival_time = models.DateTimeField()
+    tickets_sold = models.PositiveIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["route", "departure_time"]),
+            models.Index(fields=["airplane", "departure_time"]),
+            models.Index(fields=["departure_time"]),
+        ]
 
+    @uses_relations("route.__str__")
     def __str__(self):
         return (
             f"{self.route}, "
@@ -97,10 +119,38 @@ class Flight(models.Model):
         )
 
     @property
+    @uses_relations("airplane")
+    def capacity(self):
+        return self.airplane.seats_in_row * self.airplane.rows
+
+    @property
+    @uses_relations("capacity")
     def available_places(self):
-        return (
-            self.airplane.seats_in_row * self.airplane.rows
-            - self.tickets.count()
+        return self.capacity - self.tickets_sold
+
+    @staticmethod
+    def add_tickets_sold(counts: dict[int, int]):
+        """
+        Add the ticket counts by flight id to tickets_sold, in one
+        update. Counts of removed tickets are negative.
+        """
+        counts = {flight_id: n for flight_id, n in counts.items() if n}
+        if not counts:
+            return
+        Flight.objects.filter(id__in=counts).update(
+            updated_at=Now(),
+            tickets_sold=Greatest(
+                models.F("tickets_sold")
+                + models.Case(
+                    *(
+                        models.When(id=flight_id, then=models.Value(n))
+                        for flight_id, n in counts.items()
+                    ),
+                    default=models.Value(0),
+                    output_field=models.IntegerField(),
+                ),
+                models.Value(0),
+            ),
         )
 
 
@@ -113,6 +163,7 @@ class Ticket(models.Model):
     order = models.ForeignKey(
         Order, on_delete=models.CASCADE, related_name="tickets"
     )
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ("flight", "row", "seat")
@@ -133,5 +184,30 @@ class Ticket(models.Model):
             ValidationError("Invalid seat number"),
         )
 
+    @uses_relations("flight.route.__str__")
     def __str__(self):
         return f"{self.flight.route}, row: {self.row}, seat: {self.seat}"
+
+
+class SeatHold(models.Model):
+    row = models.IntegerField()
+    seat = models.IntegerField()
+    flight = models.ForeignKey(
+        Flight, on_delete=models.CASCADE, related_name="seat_holds"
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="seat_holds",
+    )
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        unique_together = ("flight", "row", "seat")
+
+    @uses_relations("user")
+    def __str__(self):
+        return (
+            f"Hold of row: {self.row}, seat: {self.seat} "
+            f"by {self.user} until {self.expires_at}"
+        )
@@ -16,6 +16,26 @@ flight_parameters = [
         description="ID of the airplane crew.",
         type=int,
     ),
+    OpenApiParameter(
+        name="source",
+        description="ID of the departure airport.",
+        type=int,
+    ),
+    OpenApiParameter(
+        name="destination",
+        description="ID of the arrival airport.",
+        type=int,
+    ),
+    OpenApiParameter(
+        name="departure_after",
+        description="Date or time the flight departs at or after.",
+        type=str,
+    ),
+    OpenApiParameter(
+        name="departure_before",
+        description="Date or time the flight departs before.",
+        type=str,
+    ),
 ]
 airplane_type_parameters = [
     OpenApiParameter(
@@ -36,3 +56,107 @@ route_parameters = [
         type=int,
     ),
 ]
+route_flights_parameters = [
+    OpenApiParameter(
+        name="departure_after",
+        description="Date or time the shown flights depart at or after.",
+        type=str,
+    ),
+    OpenApiParameter(
+        name="departure_before",
+        description="Date or time the shown flights depart before.",
+        type=str,
+    ),
+    OpenApiParameter(
+        name="flights_limit",
+        description="Number of flights to show, 50 by default, up to 500.",
+        type=int,
+    ),
+]
+seat_map_parameters = [
+    OpenApiParameter(
+        name="expand",
+        description="Return the seat map as rows of occupied flags "
+        "instead of a base64 bitset.",
+        type=bool,
+    ),
+]
+connection_parameters = [
+    OpenApiParameter(
+        name="source",
+        description="ID of the departure airport.",
+        type=int,
+        required=True,
+    ),
+    OpenApiParameter(
+        name="destination",
+        description="ID of the arrival airport.",
+        type=int,
+        required=True,
+    ),
+    OpenApiParameter(
+        name="departure_after",
+        description="Earliest departure of the first flight, now by default.",
+        type=str,
+    ),
+    OpenApiParameter(
+        name="departure_before",
+        description="Latest departure of the first flight, "
+        "a day after departure_after by default.",
+        type=str,
+    ),
+    OpenApiParameter(
+        name="max_connections",
+        description="Maximum number of connections, 1 by default.",
+        type=int,
+    ),
+    OpenApiParameter(
+        name="min_layover",
+        description="Minimum layover in minutes, 60 by default.",
+        type=int,
+    ),
+    OpenApiParameter(
+        name="max_layover",
+        description="Maximum layover in minutes, 720 by default.",
+        type=int,
+    ),
+    OpenApiParameter(
+        name="limit",
+        description="Maximum number of itineraries, 10 by default.",
+        type=int,
+    ),
+]
+shortest_path_parameters = [
+    OpenApiParameter(
+        name="source",
+        description="ID of the departure airport.",
+        type=int,
+        required=True,
+    ),
+    OpenApiParameter(
+        name="destination",
+        description="ID of the arrival airport.",
+        type=int,
+        required=True,
+    ),
+]
+output_parameter = OpenApiParameter(
+    name="output",
+    description="Export format: csv (default) or ndjson.",
+    type=str,
+    enum=["csv", "ndjson"],
+)
+flight_export_parameters = [*flight_parameters, output_parameter]
+order_export_parameters = [
+    OpenApiParameter(
+        name="created_after",
+        description="Date or time the order was created at or after.",
+        type=str,
+    ),
+    OpenApiParameter(
+        name="created_before",
+        description="Date or time the order was created before.",
+        type=str,
+    ),
+    output_parameter,
+]
@@ -0,0 +1,55 @@
+from django.db import connections
+
+
+def pooled_aliases() -> list[str]:
+    """Database aliases using a psycopg connection pool."""
+    return [
+        alias
+        for alias in connections
+        if connections[alias].vendor == "postgresql"
+        and connections[alias].settings_dict["OPTIONS"].get("pool")
+    ]
+
+
+def close_pools():
+    """
+    Close the pools of this process, so a forked process does not share
+    their connections and threads. They reopen on the next query.
+    """
+    for alias in pooled_aliases():
+        connections[alias].close_pool()
+
+
+def pool_metrics(alias: str, stats: dict) -> dict:
+    """
+    Size, saturation and wait time of a pool from the `get_stats()` of
+    psycopg_pool. Counters only appear once they are non-zero and add
+    up from the start of the process.
+    """
+    in_use = stats["pool_size"] - stats["pool_available"]
+    queued = stats.get("requests_queued", 0)
+    wait_ms = stats.get("requests_wait_ms", 0)
+    return {
+        "alias": alias,
+        "min_size": stats["pool_min"],
+        "max_size": stats["pool_max"],
+        "size": stats["pool_size"],
+        "available": stats["pool_available"],
+        "in_use": in_use,
+        "saturation": round(in_use / stats["pool_max"], 3),
+        "waiting": stats.get("requests_waiting", 0),
+        "requests": stats.get("requests_num", 0),
+        "queued_requests": queued,
+        "wait_ms": wait_ms,
+        "average_wait_ms": round(wait_ms / queued, 3) if queued else 0.0,
+        "timeouts": stats.get("requests_errors", 0),
+        "connections_opened": stats.get("connections_num", 0),
+        "connections_lost": stats.get("connections_lost", 0),
+    }
+
+
+def database_pool_metrics() -> list[dict]:
+    return [
+        pool_metrics(alias, connections[alias].pool.get_stats())
+        for alias in pooled_aliases()
+    ]
@@ -0,0 +1,274 @@
+from functools import cache
+
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+
+def uses_relations(*sources):
+    """
+    Declare the relations a model method or property reads, as dotted
+    serializer sources, e.g. `@uses_relations("route.__str__")`.
+    """
+
+    def decorator(function):
+        function.relation_sources = sources
+        return function
+
+    return decorator
+
+
+def attribute_sources(model, name) -> tuple[str, ...]:
+    attribute = getattr(model, name, None)
+    if isinstance(attribute, property):
+        attribute = attribute.fget
+    return getattr(attribute, "relation_sources", ())
+
+
+@cache
+def relation_fields(model) -> dict:
+    """Relation fields of `model` keyed by their attribute name."""
+    fields = {}
+    for field in model._meta.get_fields():
+        if field.is_relation and field.related_model is not None:
+            name = field.name if field.concrete else field.get_accessor_name()
+            fields[name] = field
+    return fields
+
+
+def is_many(field) -> bool:
+    return field.many_to_many or field.one_to_many
+
+
+class SerializerPlan:
+    """
+    Relations a serializer reads from its model, including nested
+    serializers, dotted sources and the `uses_relations` of the model
+    methods and properties they reach.
+
+    `relations` maps attribute names to `(field, relations of the
+    related model)`. `unresolved` names the fields that read attributes
+    the plan cannot see through.
+    """
+
+    def __init__(self, serializer_class):
+        self.relations = {}
+        self.unresolved = []
+
+        model = getattr(getattr(serializer_class, "Meta", None), "model", None)
+        if model is not None:
+            self.add_serializer(serializer_class(), model, self.relations, "")
+            fold_back_references(self.relations)
+
+    def add_serializer(self, serializer, model, relations, label):
+        for field in serializer.fields.values():
+            if not field.write_only:
+                self.add_field(field, model, relations, label)
+
+    def add_field(self, field, model, relations, label):
+        name = f"{label}{field.field_name}"
+        if isinstance(field, serializers.SerializerMethodField):
+            self.unresolved.append(name)
+            return
+
+        if field.source == "*":
+            if isinstance(field, serializers.BaseSerializer):
+                self.add_serializer(field, model, relations, f"{name}.")
+            return
+
+        attrs = field.source_attrs
+        if (
+            isinstance(field, serializers.RelatedField)
+            and field.use_pk_only_optimization()
+        ):
+            # only the object holding the foreign key is read
+            attrs = attrs[:-1]
+
+        target = self.resolve(model, attrs, relations, name)
+        if target is None:
+            return
+
+        related_model, related = target
+        if isinstance(field, serializers.ListSerializer):
+            field = field.child
+        if isinstance(field, serializers.ManyRelatedField):
+            field = field.child_relation
+
+        if isinstance(field, serializers.BaseSerializer):
+            self.add_serializer(field, related_model, related, f"{name}.")
+        elif isinstance(field, serializers.SlugRelatedField):
+            self.resolve(
+                related_model, field.slug_field.split("__"), related, name
+            )
+        elif not (
+            isinstance(field, serializers.RelatedField)
+            and field.use_pk_only_optimization()
+        ):
+            self.resolve(related_model, ["__str__"], related, name)
+
+    def resolve(self, model, attrs, relations, name):
+        """
+        Add the relations read by following `attrs` from `model`.
+        Return the model and relations of the object the path ends at,
+        or None if it ends at a plain attribute.
+        """
+        for index, attr in enumerate(attrs):
+            field = relation_fields(model).get(attr)
+            if field is None:
+                for source in attribute_sources(model, attr):
+                    self.resolve(model, source.split("."), relations, name)
+                if index < len(attrs) - 1:
+                    self.unresolved.append(name)
+                return None
+
+            model = field.related_model
+            relations = relations.setdefault(attr, (field, {}))[1]
+
+        return model, relations
+
+
+def merge_relations(relations, other):
+    for name, (field, related) in other.items():
+        merge_relations(relations.setdefault(name, (field, {}))[1], related)
+
+
+def fold_back_references(relations):
+    """
+    Objects prefetched through a reverse foreign key already point back
+    at their parent, so what is read through that foreign key is read
+    from the parent.
+    """
+    for name, (field, related) in list(relations.items()):
+        fold_back_references(related)
+        if field.one_to_many and field.field.name in related:
+            merge_relations(relations, related.pop(field.field.name)[1])
+
+
+@cache
+def serializer_plan(serializer_class) -> SerializerPlan:
+    return SerializerPlan(serializer_class)
+
+
+def relation_lookups(relations, prefix=""):
+    for name, (field, related) in relations.items():
+        yield f"{prefix}{name}"
+        yield from relation_lookups(related, f"{prefix}{name}__")
+
+
+def plan_queryset(queryset, relations, lookups=None):
+    """
+    Join the single-valued `relations` with select_related and load the
+    many-valued ones with prefetch_related. Relations the queryset
+    already prefetches stay separate queries, and their querysets get
+    the plan of what is read through them.
+
+    `lookups` maps prefetch paths to the Prefetch to plan them with, or
+    to None for the default queryset.
+    """
+    lookups = dict(lookups or {})
+    kept = []
+    for lookup in queryset._prefetch_related_lookups:
+        if not isinstance(lookup, Prefetch):
+            lookup = Prefetch(lookup)
+        if lookup.to_attr:
+            kept.append(lookup)
+            continue
+
+        parts = lookup.prefetch_to.split("__")
+        for end in range(1, len(parts)):
+            lookups.setdefault("__".join(parts[:end]), None)
+        lookups[lookup.prefetch_to] = lookup
+
+    selects = []
+    prefetches = []
+
+    def walk(relations, prefix):
+        for name, (field, related) in relations.items():
+            lookup = f"{prefix}{name}"
+            if not is_many(field) and lookup not in lookups:
+                selects.append(lookup)
+                walk(related, f"{lookup}__")
+                continue
+
+            existing = lookups.pop(lookup, None)
+            nested = {
+                key.removeprefix(f"{lookup}__"): lookups.pop(key)
+                for key in list(lookups)
+                if key.startswith(f"{lookup}__")
+            }
+            if existing is not None and existing.queryset is not None:
+                related_queryset = existing.queryset
+            else:
+                related_queryset = field.related_model._default_manager.all()
+            prefetches.append(
+                Prefetch(
+                    lookup,
+                    queryset=plan_queryset(related_queryset, related, nested),
+                )
+            )
+
+    walk(relations, "")
+    prefetches.extend(
+        Prefetch(path, queryset=lookup.queryset)
+        for path, lookup in lookups.items()
+        if lookup is not None
+    )
+    queryset = queryset.prefetch_related(None)
+    if selects:
+        # select_related() without lookups would follow every foreign key
+        queryset = queryset.select_related(*selects)
+    return queryset.prefetch_related(*prefetches, *kept)
+
+
+def selected_lookups(select_related, prefix=""):
+    for name, related in select_related.items():
+        yield f"{prefix}{name}"
+        yield from selected_lookups(related, f"{prefix}{name}__")
+
+
+def lazy_loads(queryset, relations) -> list[str]:
+    """Lookups of `relations` that `queryset` neither joins nor prefetches."""
+    if queryset.query.select_related is True:
+        return []
+
+    loaded = set(selected_lookups(queryset.query.select_related or {}))
+    for lookup in queryset._prefetch_related_lookups:
+        if not isinstance(lookup, Prefetch):
+            lookup = Prefetch(lookup)
+        parts = lookup.prefetch_to.split("__")
+        loaded.update("__".join(parts[:end]) for end in range(1, len(parts)))
+        loaded.add(lookup.prefetch_to)
+        if lookup.queryset is not None and isinstance(
+            lookup.queryset.query.select_related, dict
+        ):
+            loaded.update(
+                selected_lookups(
+                    lookup.queryset.query.select_related,
+                    f"{lookup.prefetch_to}__",
+                )
+            )
+
+    return [
+        lookup
+        for lookup in relation_lookups(relations)
+        if lookup not in loaded
+    ]
+
+
+class PlannedQuerysetMixin:
+    """
+    Load what the serializer of the action reads, as planned from its
+    fields by `serializer_plan`, on top of the viewset's own queryset.
+    Viewsets only choose which relations are fetched in separate
+    queries by prefetching them.
+    """
+
+    planned_actions = ("list", "retrieve")
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action in self.planned_actions:
+            queryset = plan_queryset(
+                queryset,
+                serializer_plan(self.get_serializer_class()).relations,
+            )
+        return queryset
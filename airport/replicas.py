@@ -0,0 +1,83 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from rest_framework.permissions import SAFE_METHODS
+
+from airport.cache import CachedResponseMixin, shared_cache
+
+# set for the requests of ReplicaReadMixin viewsets that may read stale data
+read_from_replica = ContextVar("read_from_replica", default=False)
+
+
+def pin_key(user) -> str:
+    return f"airport:primary-pin:{user.pk}"
+
+
+def pin_to_primary(user):
+    """Send the reads of `user` to the primary for a while after a write."""
+    if settings.DATABASE_REPLICAS and user.is_authenticated:
+        shared_cache().set(pin_key(user), True, settings.REPLICA_PIN_SECONDS)
+
+
+def is_pinned(user) -> bool:
+    return user.is_authenticated and bool(shared_cache().get(pin_key(user)))
+
+
+class ReplicaRouter:
+    """
+    Route reads to a random alias of DATABASE_REPLICAS while
+    `read_from_replica` is set, everything else to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not settings.DATABASE_REPLICAS or not read_from_replica.get():
+            return None
+
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            # objects related to a loaded object come from the same place
+            return instance._state.db
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {"default", *settings.DATABASE_REPLICAS}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ReplicaReadMixin:
+    """
+    Read safe requests from the replicas, unless the user wrote through
+    the API in the last REPLICA_PIN_SECONDS, so users see their own
+    writes. Responses stored in the shared response cache are built
+    from the primary, as replica lag would be cached past the write.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.replica_token = read_from_replica.set(
+            bool(settings.DATABASE_REPLICAS)
+            and request.method in SAFE_METHODS
+            and not isinstance(self, CachedResponseMixin)
+            and not is_pinned(request.user)
+        )
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, "replica_token", None)
+        if token is not None:
+            read_from_replica.reset(token)
+            self.replica_token = None
+
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            pin_to_primary(request.user)
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,100 @@
+import heapq
+import threading
+from collections import defaultdict
+from typing import Iterable, NamedTuple
+
+from django.db import DEFAULT_DB_ALIAS
+
+from airport.cache import model_versions
+from airport.models import Route
+
+
+class Path(NamedTuple):
+    source: int
+    destination: int
+    distance: int | None
+    airports: list[int]
+    routes: list[int]
+
+
+class RouteGraph:
+    """
+    Airports connected by routes weighted with their distance.
+
+    The graph is loaded once per route table version, which lives in the
+    shared cache, so every process notices route changes made elsewhere.
+    It is loaded from the primary, as a lagging replica would pair the
+    new version with old routes.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = None
+        self.edges = {}
+
+    def current_edges(self) -> dict:
+        (version,) = model_versions([Route])
+        with self.lock:
+            if version != self.version:
+                edges = defaultdict(list)
+                for (
+                    route_id,
+                    source_id,
+                    destination_id,
+                    distance,
+                ) in Route.objects.using(DEFAULT_DB_ALIAS).values_list(
+                    "id", "source_id", "destination_id", "distance"
+                ):
+                    edges[source_id].append(
+                        (destination_id, distance, route_id)
+                    )
+                self.edges, self.version = edges, version
+            return self.edges
+
+    @staticmethod
+    def shortest_from(edges: dict, source: int) -> dict:
+        """Dijkstra from one airport: airport -> (distance, airport, route)."""
+        best = {source: (0, None, None)}
+        queue = [(0, source)]
+        while queue:
+            distance, airport_id = heapq.heappop(queue)
+            if distance > best[airport_id][0]:
+                continue
+            for next_id, route_distance, route_id in edges.get(airport_id, ()):
+                next_distance = distance + route_distance
+                if next_id not in best or next_distance < best[next_id][0]:
+                    best[next_id] = (next_distance, airport_id, route_id)
+                    heapq.heappush(queue, (next_distance, next_id))
+        return best
+
+    @staticmethod
+    def path_to(best: dict, source: int, destination: int) -> Path:
+        if destination not in best:
+            return Path(source, destination, None, [], [])
+
+        airports, routes = [destination], []
+        while airports[-1] != source:
+            _, previous_id, route_id = best[airports[-1]]
+            airports.append(previous_id)
+            routes.append(route_id)
+        return Path(
+            source,
+            destination,
+            best[destination][0],
+            airports[::-1],
+            routes[::-1],
+        )
+
+    def shortest_paths(self, pairs: Iterable[tuple[int, int]]) -> list[Path]:
+        """Shortest paths for many pairs, one search per distinct source."""
+        edges = self.current_edges()
+        searches = {}
+        paths = []
+        for source, destination in pairs:
+            if source not in searches:
+                searches[source] = self.shortest_from(edges, source)
+            paths.append(self.path_to(searches[source], source, destination))
+        return paths
+
+
+route_graph = RouteGraph()
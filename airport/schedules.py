@@ -0,0 +1,156 @@
+import codecs
+import csv
+import json
+from itertools import islice
+
+from django.db import transaction
+from rest_framework.exceptions import ErrorDetail
+from rest_framework.parsers import BaseParser
+
+from airport.models import Airplane, Crew, Flight, Route
+from airport.serializers import FlightScheduleRowSerializer
+
+SCHEDULE_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+
+def csv_rows(stream):
+    """
+    Yield `(line, values, error)` for the rows of a CSV schedule with
+    a header line. Crew ids are separated by spaces.
+    """
+    reader = csv.DictReader(codecs.iterdecode(stream, "utf-8"))
+    try:
+        for values in reader:
+            if values.get("crew") is not None:
+                values["crew"] = values["crew"].split()
+            yield reader.line_num, values, None
+    except (csv.Error, UnicodeDecodeError) as error:
+        yield reader.line_num + 1, None, f"Invalid CSV: {error}"
+
+
+def ndjson_rows(stream):
+    """Yield `(line, values, error)` for the objects of an NDJSON schedule."""
+    for line, text in enumerate(stream, start=1):
+        if not text.strip():
+            continue
+        try:
+            yield line, json.loads(text), None
+        except ValueError as error:
+            yield line, None, f"Invalid JSON: {error}"
+
+
+class ScheduleCSVParser(BaseParser):
+    """Parse a CSV schedule lazily, as the rows are read."""
+
+    media_type = "text/csv"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return csv_rows(stream)
+
+
+class ScheduleNDJSONParser(BaseParser):
+    """Parse a newline-delimited JSON schedule lazily."""
+
+    media_type = "application/x-ndjson"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return ndjson_rows(stream)
+
+
+def existing_ids(model, ids) -> set:
+    return set(model.objects.filter(pk__in=ids).values_list("pk", flat=True))
+
+
+def missing_error(value):
+    return [
+        ErrorDetail(
+            f'Invalid pk "{value}" - object does not exist.',
+            code="does_not_exist",
+        )
+    ]
+
+
+class ScheduleImport:
+    """
+    Create flights and their crew from parsed schedule rows, a chunk of
+    rows at a time: each chunk is validated with one lookup per related
+    model and inserted in its own transaction. Invalid rows are skipped
+    and reported by line.
+    """
+
+    def __init__(self, chunk_size=SCHEDULE_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+
+    def run(self, rows):
+        rows = iter(rows)
+        while chunk := list(islice(rows, self.chunk_size)):
+            self.import_chunk(chunk)
+        return self
+
+    def report(self, line, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "errors": errors})
+
+    def import_chunk(self, chunk):
+        failures = {}
+        valid = []
+        for line, values, error in chunk:
+            if error is not None:
+                failures[line] = {"non_field_errors": [error]}
+                continue
+            serializer = FlightScheduleRowSerializer(data=values)
+            if serializer.is_valid():
+                valid.append((line, serializer.validated_data))
+            else:
+                failures[line] = serializer.errors
+
+        routes = existing_ids(Route, {row["route"] for _, row in valid})
+        airplanes = existing_ids(
+            Airplane, {row["airplane"] for _, row in valid}
+        )
+        crew = existing_ids(
+            Crew, {member for _, row in valid for member in row["crew"]}
+        )
+
+        flights = []
+        for line, row in valid:
+            errors = {}
+            if row["route"] not in routes:
+                errors["route"] = missing_error(row["route"])
+            if row["airplane"] not in airplanes:
+                errors["airplane"] = missing_error(row["airplane"])
+            unknown = [member for member in row["crew"] if member not in crew]
+            if unknown:
+                errors["crew"] = missing_error(unknown[0])
+
+            if errors:
+                failures[line] = errors
+            else:
+                flights.append(row)
+
+        for line in sorted(failures):
+            self.report(line, failures[line])
+        if not flights:
+            return
+
+        with transaction.atomic():
+            created = Flight.objects.bulk_create(
+                Flight(
+                    route_id=row["route"],
+                    airplane_id=row["airplane"],
+                    departure_time=row["departure_time"],
+                    arrival_time=row["arrival_time"],
+                )
+                for row in flights
+            )
+            Flight.crew.through.objects.bulk_create(
+                Flight.crew.through(flight_id=flight.pk, crew_id=member)
+                for flight, row in zip(created, flights)
+                for member in set(row["crew"])
+            )
+        self.created += len(created)
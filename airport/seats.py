@@ -0,0 +1,85 @@
+import base64
+from typing import Iterable
+
+
+def seat_index(row: int, seat: int, seats_in_row: int) -> int:
+    """Position of a seat in a row-major seat grid, counting from 0."""
+    return (row - 1) * seats_in_row + seat - 1
+
+
+def occupancy_bitmap(
+    rows: int, seats_in_row: int, occupied: Iterable[tuple[int, int]]
+) -> bytearray:
+    """
+    Pack occupied (row, seat) pairs into a row-major bitset,
+    most significant bit first. Seats outside the grid are ignored.
+    """
+    bitmap = bytearray((rows * seats_in_row + 7) // 8)
+
+    for row, seat in occupied:
+        if 1 <= row <= rows and 1 <= seat <= seats_in_row:
+            index = seat_index(row, seat, seats_in_row)
+            bitmap[index >> 3] |= 0x80 >> (index & 7)
+
+    return bitmap
+
+
+def encode_bitmap(bitmap: bytearray) -> str:
+    return base64.b64encode(bitmap).decode("ascii")
+
+
+def expand_bitmap(
+    bitmap: bytearray, rows: int, seats_in_row: int
+) -> list[list[bool]]:
+    """Unpack a bitset into a list of rows of occupied flags."""
+    return [
+        [
+            bool(bitmap[index >> 3] & (0x80 >> (index & 7)))
+            for index in range(row * seats_in_row, (row + 1) * seats_in_row)
+        ]
+        for row in range(rows)
+    ]
+
+
+def find_seats(
+    rows: int,
+    seats_in_row: int,
+    occupied: Iterable[tuple[int, int]],
+    count: int,
+    adjacent: bool = True,
+) -> list[tuple[int, int]] | None:
+    """
+    Pick `count` free (row, seat) pairs, front rows first.
+
+    With `adjacent`, the first row that has `count` free seats side by
+    side is used. Otherwise, or when no row has such a block, free seats
+    are taken in row-major order, which keeps them as close as possible.
+    Returns None when the airplane has fewer free seats than requested.
+    """
+    taken = [0] * (rows + 1)
+    for row, seat in occupied:
+        if 1 <= row <= rows and 1 <= seat <= seats_in_row:
+            taken[row] |= 1 << (seat - 1)
+
+    all_seats = (1 << seats_in_row) - 1
+    free = [~row_taken & all_seats for row_taken in taken]
+
+    if adjacent and count <= seats_in_row:
+        for row in range(1, rows + 1):
+            block_starts = free[row]
+            for shift in range(1, count):
+                block_starts &= free[row] >> shift
+            if block_starts:
+                first = (block_starts & -block_starts).bit_length()
+                return [(row, seat) for seat in range(first, first + count)]
+
+    seats = []
+    for row in range(1, rows + 1):
+        row_free = free[row]
+        while row_free and len(seats) < count:
+            lowest = row_free & -row_free
+            seats.append((row, lowest.bit_length()))
+            row_free ^= lowest
+        if len(seats) == count:
+            return seats
+    return None
@@ -1,4 +1,11 @@
-from django.db import transaction
+from collections import Counter
+from datetime import datetime, timedelta
+from itertools import chain
+
+from django.conf import settings
+from django.db import IntegrityError, connection, models, transaction
+from django.db.models import Prefetch, Q
+from django.utils import timezone
 from rest_framework import serializers
 
 from airport.models import (
@@ -10,7 +17,30 @@ from airport.models import (
     Airplane,
     Flight,
     Ticket,
+    SeatHold,
 )
+from airport.seats import find_seats
+
+SEAT_ASSIGNMENT_ATTEMPTS = 5
+
+
+def claim_rows(flight_id: int, rows: set[int]) -> set[int]:
+    """
+    Try to lock the rows of a flight until the end of the transaction,
+    without waiting. Return the rows locked by others.
+
+    Only PostgreSQL needs it, SQLite runs one writing transaction at a
+    time.
+    """
+    if connection.vendor != "postgresql":
+        return set()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT row, pg_try_advisory_xact_lock(%s::bigint << 16 | row) "
+            "FROM unnest(%s::integer[]) AS row",
+            [flight_id, sorted(rows)],
+        )
+        return {row for row, locked in cursor.fetchall() if not locked}
 
 
 class AirplaneInfoSerializer(serializers.ModelSerializer):
@@ -96,7 +126,7 @@ class RouteListSerializer(serializers.ModelSerializer):
         return Route.objects.create(
             source=Airport.objects.get(name=source),
             destination=Airport.objects.get(name=destination),
-            **validated_data
+            **validated_data,
         )
 
     def update(self, instance, validated_data):
@@ -208,12 +238,60 @@ class FlightRetrieveSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
+class FlightRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Accepts a flight id, represents the flight as its description.
+    Looks flights up in `flights` when they were resolved in advance.
+    """
+
+    flights = None
+
+    def use_pk_only_optimization(self):
+        return False
+
+    def to_internal_value(self, data):
+        if self.flights is None:
+            return super().to_internal_value(data)
+
+        try:
+            return self.flights[int(data)]
+        except KeyError:
+            self.fail("does_not_exist", pk_value=data)
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+
+    def to_representation(self, value):
+        return str(value)
+
+
+class TicketBatchSerializer(serializers.ListSerializer):
+    """Resolves the flights of all tickets with a single query."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            flight_ids = set()
+            for ticket in data:
+                try:
+                    flight_ids.add(int(ticket["flight"]))
+                except (KeyError, TypeError, ValueError):
+                    continue
+
+            self.child.fields["flight"].flights = (
+                Flight.objects.select_related("airplane").in_bulk(flight_ids)
+            )
+
+        return super().to_internal_value(data)
+
+
 class TicketListSerializer(serializers.ModelSerializer):
-    flight = serializers.CharField()
+    flight = FlightRelatedField(queryset=Flight.objects.all())
 
     class Meta:
         model = Ticket
         fields = "id", "row", "seat", "flight"
+        list_serializer_class = TicketBatchSerializer
+        # seats are checked for all tickets at once by OrderListSerializer
+        validators = []
 
     def validate(self, attrs):
         Ticket.validate_ticket(
@@ -226,26 +304,406 @@ class TicketListSerializer(serializers.ModelSerializer):
         return attrs
 
 
+class TicketFlightSerializer(FlightRetrieveSerializer):
+    """Renders each flight once, however many tickets share it."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.representations = {}
+
+    def to_representation(self, instance):
+        if instance.pk not in self.representations:
+            self.representations[instance.pk] = super().to_representation(
+                instance
+            )
+        return self.representations[instance.pk]
+
+
 class TicketRetrieveSerializer(TicketListSerializer):
-    flight = FlightRetrieveSerializer()
+    flight = TicketFlightSerializer()
+
+
+class SeatRequestSerializer(serializers.Serializer):
+    flight = serializers.PrimaryKeyRelatedField(
+        queryset=Flight.objects.select_related("airplane")
+    )
+    count = serializers.IntegerField(min_value=1)
+    adjacent = serializers.BooleanField(default=True)
 
 
 class OrderListSerializer(serializers.ModelSerializer):
-    tickets = TicketListSerializer(many=True)
+    tickets = TicketListSerializer(many=True, required=False)
+    auto_seats = SeatRequestSerializer(
+        many=True, write_only=True, required=False
+    )
 
     class Meta:
         model = Order
-        fields = "id", "created_at", "tickets"
+        fields = "id", "created_at", "tickets", "auto_seats"
+
+    def validate(self, attrs):
+        if not attrs.get("tickets") and not attrs.get("auto_seats"):
+            raise serializers.ValidationError(
+                "Provide tickets or seats to assign automatically"
+            )
+        return attrs
+
+    def validate_tickets(self, tickets):
+        seats = [
+            (ticket["flight"].id, ticket["row"], ticket["seat"])
+            for ticket in tickets
+        ]
+
+        requested = set(seats)
+        if len(requested) != len(seats):
+            raise serializers.ValidationError(
+                "The same seat is booked more than once"
+            )
+
+        seat_lookup = {
+            "flight_id__in": {flight_id for flight_id, _, _ in seats},
+            "row__in": {row for _, row, _ in seats},
+            "seat__in": {seat for _, _, seat in seats},
+        }
+        user = self.context["request"].user
+        self.held_seat_ids = []
+        held_by_user = set()
+        held_by_others = set()
+
+        for hold_id, user_id, *seat in SeatHold.objects.filter(
+            expires_at__gt=timezone.now(), **seat_lookup
+        ).values_list("id", "user_id", "flight_id", "row", "seat"):
+            seat = tuple(seat)
+            if seat not in requested:
+                continue
+            if user_id == user.id:
+                self.held_seat_ids.append(hold_id)
+                held_by_user.add(seat)
+            else:
+                held_by_others.add(seat)
+
+        # seats held by the user can't have been sold to anyone else
+        unheld = requested - held_by_user - held_by_others
+        taken = held_by_others
+        if unheld:
+            taken = taken.union(
+                unheld.intersection(
+                    Ticket.objects.filter(**seat_lookup).values_list(
+                        "flight_id", "row", "seat"
+                    )
+                )
+            )
+
+        if taken:
+            raise serializers.ValidationError(
+                [
+                    f"Seat {seat} in row {row} of flight {flight_id} "
+                    f"is already taken"
+                    for flight_id, row, seat in sorted(taken)
+                ]
+            )
+        return tickets
+
+    @staticmethod
+    def assign_seats(order, seat_request):
+        """
+        Book the best free seats of a flight for the order.
+
+        Orders assigning seats never wait for each other: a row is
+        claimed with a lock that is only tried, and a row claimed by a
+        concurrent order counts as occupied for this search. If a seat
+        was sold since the occupancy was read, the insert fails in a
+        savepoint and the search is repeated over the fresh occupancy.
+        """
+        flight = seat_request["flight"]
+        count = seat_request["count"]
+        seats_in_row = flight.airplane.seats_in_row
+        busy_rows = set()
+        attempts = 0
+
+        while attempts < SEAT_ASSIGNMENT_ATTEMPTS:
+            occupied = chain(
+                Ticket.objects.filter(flight=flight).values_list(
+                    "row", "seat"
+                ),
+                SeatHold.objects.filter(
+                    flight=flight, expires_at__gt=timezone.now()
+                ).values_list("row", "seat"),
+                (
+                    (row, seat)
+                    for row in busy_rows
+                    for seat in range(1, seats_in_row + 1)
+                ),
+            )
+            seats = find_seats(
+                flight.airplane.rows,
+                seats_in_row,
+                occupied,
+                count,
+                seat_request["adjacent"],
+            )
+            if seats is None and busy_rows:
+                break
+            if seats is None:
+                raise serializers.ValidationError(
+                    {
+                        "auto_seats": [
+                            f"Flight {flight.id} has less than "
+                            f"{count} free seats"
+                        ]
+                    }
+                )
+
+            busy = claim_rows(flight.id, {row for row, _ in seats})
+            if busy:
+                busy_rows |= busy
+                continue
+
+            attempts += 1
+            try:
+                with transaction.atomic():
+                    return Ticket.objects.bulk_create(
+                        Ticket(order=order, flight=flight, row=row, seat=seat)
+                        for row, seat in seats
+                    )
+            except IntegrityError:
+                continue
+
+        raise serializers.ValidationError(
+            {"auto_seats": [f"Seats of flight {flight.id} are in demand"]}
+        )
 
     def create(self, validated_data):
-        with transaction.atomic():
-            tickets_data = validated_data.pop("tickets")
-            user = self.context["request"].user
-            order = Order.objects.create(user=user, **validated_data)
-            for ticket in tickets_data:
-                Ticket.objects.create(order=order, **ticket)
-            return order
+        try:
+            with transaction.atomic():
+                tickets_data = validated_data.pop("tickets", [])
+                seat_requests = validated_data.pop("auto_seats", [])
+                user = self.context["request"].user
+                order = Order.objects.create(user=user, **validated_data)
+                tickets = Ticket.objects.bulk_create(
+                    Ticket(order=order, **ticket) for ticket in tickets_data
+                )
+                SeatHold.objects.filter(
+                    id__in=getattr(self, "held_seat_ids", ())
+                ).delete()
+                for seat_request in seat_requests:
+                    tickets += self.assign_seats(order, seat_request)
+
+                # bulk_create sends no post_save to count the tickets
+                Flight.add_tickets_sold(
+                    Counter(ticket.flight_id for ticket in tickets)
+                )
+        except IntegrityError:
+            raise serializers.ValidationError(
+                {"tickets": ["One of the seats has just been taken"]}
+            )
+
+        models.prefetch_related_objects(
+            [order],
+            Prefetch(
+                "tickets",
+                queryset=Ticket.objects.select_related(
+                    "flight__route__source", "flight__route__destination"
+                ).order_by("id"),
+            ),
+        )
+        return order
 
 
 class OrderRetrieveSerializer(OrderListSerializer):
     tickets = TicketRetrieveSerializer(many=True)
+
+
+class SeatSerializer(serializers.Serializer):
+    row = serializers.IntegerField()
+    seat = serializers.IntegerField()
+
+
+class SeatHoldSerializer(serializers.Serializer):
+    seats = SeatSerializer(many=True, allow_empty=False)
+    expires_at = serializers.DateTimeField(read_only=True)
+
+    def validate_seats(self, seats):
+        airplane = self.context["flight"].airplane
+        for seat in seats:
+            Ticket.validate_ticket(
+                seat["seat"],
+                seat["row"],
+                airplane.seats_in_row,
+                airplane.rows,
+                serializers.ValidationError("Invalid seat number"),
+            )
+
+        if len({(seat["row"], seat["seat"]) for seat in seats}) != len(seats):
+            raise serializers.ValidationError(
+                "The same seat is held more than once"
+            )
+        return seats
+
+    def create(self, validated_data):
+        flight = self.context["flight"]
+        user = self.context["request"].user
+        seats = {
+            (seat["row"], seat["seat"]) for seat in validated_data["seats"]
+        }
+        now = timezone.now()
+
+        sold = seats.intersection(
+            Ticket.objects.filter(
+                flight=flight,
+                row__in={row for row, _ in seats},
+                seat__in={seat for _, seat in seats},
+            ).values_list("row", "seat")
+        )
+        if sold:
+            raise serializers.ValidationError(
+                {
+                    "seats": [
+                        f"Seat {seat} in row {row} is already taken"
+                        for row, seat in sorted(sold)
+                    ]
+                }
+            )
+
+        expires_at = now + settings.SEAT_HOLD_TTL
+        try:
+            with transaction.atomic():
+                # expired holds are swept lazily, whenever seats are held
+                flight.seat_holds.filter(
+                    Q(expires_at__lte=now) | Q(user=user)
+                ).delete()
+                SeatHold.objects.bulk_create(
+                    SeatHold(
+                        flight=flight,
+                        user=user,
+                        row=row,
+                        seat=seat,
+                        expires_at=expires_at,
+                    )
+                    for row, seat in seats
+                )
+        except IntegrityError:
+            raise serializers.ValidationError(
+                {"seats": ["Some of the seats are held by another customer"]}
+            )
+
+        return {"seats": validated_data["seats"], "expires_at": expires_at}
+
+
+class ConnectionSearchSerializer(serializers.Serializer):
+    source = serializers.IntegerField()
+    destination = serializers.IntegerField()
+    departure_after = serializers.DateTimeField(required=False)
+    departure_before = serializers.DateTimeField(required=False)
+    max_connections = serializers.IntegerField(
+        min_value=0, max_value=3, default=1
+    )
+    min_layover = serializers.IntegerField(min_value=0, default=60)
+    max_layover = serializers.IntegerField(min_value=0, default=720)
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=10)
+
+    def validate(self, attrs):
+        attrs.setdefault("departure_after", timezone.now())
+        attrs.setdefault(
+            "departure_before", attrs["departure_after"] + timedelta(days=1)
+        )
+        if attrs["min_layover"] > attrs["max_layover"]:
+            raise serializers.ValidationError(
+                "min_layover must not exceed max_layover"
+            )
+        return attrs
+
+
+class ConnectionLegSerializer(serializers.Serializer):
+    flight = serializers.IntegerField(source="flight_id")
+    route = serializers.IntegerField(source="route_id")
+    source = serializers.IntegerField(source="source_id")
+    destination = serializers.IntegerField(source="destination_id")
+    departure_time = serializers.DateTimeField()
+    arrival_time = serializers.DateTimeField()
+
+
+class ConnectionSerializer(serializers.Serializer):
+    departure_time = serializers.SerializerMethodField()
+    arrival_time = serializers.SerializerMethodField()
+    connections = serializers.SerializerMethodField()
+    flights = ConnectionLegSerializer(many=True, source="*")
+
+    def get_departure_time(self, legs) -> datetime:
+        return serializers.DateTimeField().to_representation(
+            legs[0].departure_time
+        )
+
+    def get_arrival_time(self, legs) -> datetime:
+        return serializers.DateTimeField().to_representation(
+            legs[-1].arrival_time
+        )
+
+    def get_connections(self, legs) -> int:
+        return len(legs) - 1
+
+
+class AirportPairSerializer(serializers.Serializer):
+    source = serializers.IntegerField()
+    destination = serializers.IntegerField()
+
+
+class AirportPairsSerializer(serializers.Serializer):
+    pairs = AirportPairSerializer(
+        many=True, allow_empty=False, max_length=1000
+    )
+
+
+class ShortestPathSerializer(serializers.Serializer):
+    source = serializers.IntegerField()
+    destination = serializers.IntegerField()
+    distance = serializers.IntegerField(allow_null=True)
+    airports = serializers.ListField(child=serializers.IntegerField())
+    routes = serializers.ListField(child=serializers.IntegerField())
+
+
+class FlightScheduleRowSerializer(serializers.Serializer):
+    # ids are checked against the database a batch of rows at a time
+    route = serializers.IntegerField(min_value=1)
+    airplane = serializers.IntegerField(min_value=1)
+    departure_time = serializers.DateTimeField()
+    arrival_time = serializers.DateTimeField()
+    crew = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), default=list
+    )
+
+    def validate(self, attrs):
+        if attrs["arrival_time"] < attrs["departure_time"]:
+            raise serializers.ValidationError(
+                "arrival_time must not be before departure_time"
+            )
+        return attrs
+
+
+class FlightScheduleErrorSerializer(serializers.Serializer):
+    line = serializers.IntegerField()
+    errors = serializers.DictField()
+
+
+class FlightScheduleReportSerializer(serializers.Serializer):
+    created = serializers.IntegerField()
+    failed = serializers.IntegerField()
+    errors = FlightScheduleErrorSerializer(many=True)
+
+
+class DatabasePoolSerializer(serializers.Serializer):
+    alias = serializers.CharField()
+    min_size = serializers.IntegerField()
+    max_size = serializers.IntegerField()
+    size = serializers.IntegerField()
+    available = serializers.IntegerField()
+    in_use = serializers.IntegerField()
+    saturation = serializers.FloatField()
+    waiting = serializers.IntegerField()
+    requests = serializers.IntegerField()
+    queued_requests = serializers.IntegerField()
+    wait_ms = serializers.IntegerField()
+    average_wait_ms = serializers.FloatField()
+    timeouts = serializers.IntegerField()
+    connections_opened = serializers.IntegerField()
+    connections_lost = serializers.IntegerField()
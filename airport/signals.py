@@ -0,0 +1,106 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from airport.cache import bump_model_version
+from airport.itineraries import INDEX_MODELS, flight_index
+from airport.models import Flight, Route, Ticket
+
+
+@receiver(pre_save, sender=Ticket)
+def remember_flight(sender, instance, raw, **kwargs):
+    """Note the flight a saved ticket had, in case it is moved."""
+    instance.saved_flight_id = None
+    if instance.pk and not instance._state.adding and not raw:
+        instance.saved_flight_id = (
+            Ticket.objects.filter(pk=instance.pk)
+            .values_list("flight_id", flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=Ticket)
+def take_seat(sender, instance, created, raw, **kwargs):
+    """Count a new or moved ticket on its flight."""
+    if raw:
+        return
+    previous = getattr(instance, "saved_flight_id", None)
+    if created:
+        Flight.add_tickets_sold({instance.flight_id: 1})
+    elif previous is not None and previous != instance.flight_id:
+        Flight.add_tickets_sold({previous: -1, instance.flight_id: 1})
+
+
+@receiver(post_delete, sender=Ticket)
+def release_seat(sender, instance, **kwargs):
+    """Give the seat of a deleted ticket back to its flight."""
+    Flight.add_tickets_sold({instance.flight_id: -1})
+
+
+# the index marks flights and routes as changed once it has the change
+@receiver(post_save, sender=Route)
+def index_route(sender, instance, using, **kwargs):
+    transaction.on_commit(
+        partial(
+            flight_index.commit, Route, flight_index.update_route, instance
+        ),
+        using=using,
+    )
+
+
+@receiver(post_delete, sender=Route)
+def unindex_route(sender, instance, using, **kwargs):
+    # the instance loses its id after the delete
+    transaction.on_commit(
+        partial(
+            flight_index.commit, Route, flight_index.remove_route, instance.id
+        ),
+        using=using,
+    )
+
+
+@receiver(post_save, sender=Flight)
+def index_flight(sender, instance, using, **kwargs):
+    transaction.on_commit(
+        partial(
+            flight_index.commit, Flight, flight_index.update_flight, instance
+        ),
+        using=using,
+    )
+
+
+@receiver(post_delete, sender=Flight)
+def unindex_flight(sender, instance, using, **kwargs):
+    transaction.on_commit(
+        partial(
+            flight_index.commit,
+            Flight,
+            flight_index.remove_flight,
+            instance.id,
+        ),
+        using=using,
+    )
+
+
+# Versions change once the change is committed. A reader could otherwise
+# cache the rows of before the commit under the new version.
+@receiver(post_save)
+@receiver(post_delete)
+def bump_version(sender, using, **kwargs):
+    if sender._meta.app_label == "airport" and sender not in INDEX_MODELS:
+        transaction.on_commit(partial(bump_model_version, sender), using=using)
+
+
+# Crew assignments have their own version, as they are not part of the
+# flight index and must not make it reload the schedule.
+@receiver(m2m_changed, sender=Flight.crew.through)
+def bump_crew_versions(sender, action, using, **kwargs):
+    if action.startswith("post_"):
+        transaction.on_commit(partial(bump_model_version, sender), using=using)
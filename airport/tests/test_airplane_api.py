@@ -8,12 +8,13 @@ from rest_framework import status
 from rest_framework.reverse import reverse
 from rest_framework.test import APIClient
 
-from airport.models import Airplane
+from airport.models import Airplane, Flight
 from airport.serializers import (
     AirplaneListSerializer,
     AirplaneRetrieveSerializer,
 )
 from airport.tests.test_airplane_type_api import sample_airplane_type
+from airport.tests.test_route_api import sample_route
 
 # Create your tests here.
 AIRPLANE_URL = reverse("airport:airplanes-list")
@@ -93,6 +94,24 @@ class AuthorizedAirplaneApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data, serializer.data)
 
+    def test_retrieve_airplane_query_count_is_bounded(self):
+        airplane = sample_airplane()
+        route = sample_route()
+        Flight.objects.bulk_create(
+            Flight(
+                route=route,
+                airplane=airplane,
+                departure_time="2024-01-01T00:00:00Z",
+                arrival_time="2024-01-01T03:00:00Z",
+            )
+            for _ in range(10)
+        )
+
+        with self.assertNumQueries(3):
+            res = self.client.get(detail_url(airplane.id))
+
+        self.assertEqual(len(res.data["flights"]), 10)
+
     def test_create_airplane_forbidden(self):
         airplane_type = sample_airplane_type()
         payload = {
@@ -0,0 +1,114 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from airport.cache import shared_cache
+from airport.tests.test_flight_api import FLIGHT_URL
+from user.authentication import UserFlagCache, user_cache
+
+ME_URL = reverse("user:me")
+TOKEN_URL = reverse("user:token_obtain_pair")
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.test", password="TESTPASSWORD"
+        )
+
+    def authenticate(self, user):
+        token = RefreshToken.for_user(user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_user_is_read_once(self):
+        self.authenticate(self.user)
+        self.client.get(FLIGHT_URL)
+
+        with self.assertNumQueries(0):
+            self.client.post(FLIGHT_URL, {})
+
+    def test_flags_change_on_save(self):
+        self.authenticate(self.user)
+        self.assertEqual(
+            self.client.post(FLIGHT_URL, {}).status_code,
+            status.HTTP_403_FORBIDDEN,
+        )
+
+        self.user.is_staff = True
+        self.user.save()
+
+        self.assertEqual(
+            self.client.post(FLIGHT_URL, {}).status_code,
+            status.HTTP_400_BAD_REQUEST,
+        )
+
+    def test_flags_are_shared_between_processes(self):
+        self.authenticate(self.user)
+        self.client.get(FLIGHT_URL)
+
+        self.assertEqual(
+            shared_cache().get(UserFlagCache.key(self.user.pk)),
+            (True, False, False),
+        )
+
+    def test_flags_read_before_a_change_are_not_cached(self):
+        self.authenticate(self.user)
+        self.user.is_staff = True
+        self.user.save()
+
+        # a request that read the flags before the save ends after it
+        user_cache.set(self.user.pk, (True, False, False))
+        res = self.client.post(FLIGHT_URL, {})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_deactivated_user(self):
+        self.authenticate(self.user)
+        self.client.get(FLIGHT_URL)
+
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(FLIGHT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_user(self):
+        self.authenticate(self.user)
+        self.client.get(FLIGHT_URL)
+
+        self.user.delete()
+        res = self.client.get(FLIGHT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_update_me(self):
+        self.authenticate(self.user)
+        self.client.get(FLIGHT_URL)
+        get_user_model().objects.filter(pk=self.user.pk).update(is_staff=True)
+
+        res = self.client.patch(ME_URL, {"email": "new@test.test"})
+
+        self.assertEqual(res.data["email"], "new@test.test")
+        # the stale cached flags are not written back
+        self.assertTrue(get_user_model().objects.get().is_staff)
+
+    @override_settings(JWT_TRUST_CLAIMS=True, OFFLOAD_VIEWS=False)
+    def test_trusted_claims(self):
+        res = self.client.post(
+            TOKEN_URL,
+            {"email": "test@test.test", "password": "TESTPASSWORD"},
+        )
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {res.data['access']}"
+        )
+
+        with self.assertNumQueries(0):
+            res = self.client.post(FLIGHT_URL, {})
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
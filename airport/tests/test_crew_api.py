@@ -1,9 +1,11 @@
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
 from rest_framework import status
 from rest_framework.reverse import reverse
 from rest_framework.test import APIClient
 
+from airport.cache import model_versions
 from airport.models import Crew
 from airport.serializers import CrewRetrieveSerializer, CrewListSerializer
 
@@ -32,6 +34,8 @@ class UnauthorizedCrewApiTests(TestCase):
 
 class AuthorizedCrewApiTests(TestCase):
     def setUp(self):
+        # crews of earlier tests were rolled back without a new version
+        cache.clear()
         self.client = APIClient()
         self.user = get_user_model().objects.create_user(
             email="test@test.test", password="TESTPASSWORD"
@@ -51,6 +55,58 @@ class AuthorizedCrewApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data["results"], serializer.data)
 
+    def test_crews_list_is_cached(self):
+        sample_crew()
+        self.client.get(CREW_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(CREW_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 1)
+
+    def test_cached_crews_list_not_modified(self):
+        sample_crew()
+        first = self.client.get(CREW_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(
+                CREW_URL,
+                HTTP_IF_NONE_MATCH=first["ETag"],
+                HTTP_IF_MODIFIED_SINCE=first["Last-Modified"],
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_crews_list_cache_invalidated_on_write(self):
+        crew = sample_crew()
+        self.client.get(CREW_URL)
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            crew.first_name = "Changed"
+            crew.save()
+            versions = model_versions([Crew])
+        self.assertTrue(callbacks)
+        res = self.client.get(CREW_URL)
+
+        # the version only changes once the write is committed
+        self.assertNotEqual(model_versions([Crew]), versions)
+        self.assertEqual(res.data["results"][0]["full_name"], "Changed Test")
+
+    def test_crew_detail_cache_invalidated_on_flight_assignment(self):
+        from airport.tests.test_flight_api import sample_flight
+
+        crew = sample_crew()
+        flight = sample_flight()
+        url = reverse("airport:crews-detail", args=[crew.id])
+        self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            flight.crew.add(crew)
+        res = self.client.get(url)
+
+        self.assertEqual(len(res.data["flights"]), 1)
+
     def test_retrieve_crew_detail(self):
         crew = sample_crew()
         serializer = CrewRetrieveSerializer(crew)
@@ -1,20 +1,36 @@
+import base64
+import csv
+import json
+
+from datetime import datetime, timedelta
+from unittest import mock
+
 from django.contrib.auth import get_user_model
+from django.db import connection, transaction
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.reverse import reverse
-from rest_framework.test import APIClient
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
 
-from airport.models import Flight
+from airport.cache import bump_model_version, model_versions
+from airport.itineraries import INDEX_MODELS, flight_index
+from airport.models import Flight, Order, Ticket, SeatHold
 from airport.serializers import (
     FlightListSerializer,
     FlightRetrieveSerializer,
 )
 from airport.tests.test_airplane_api import sample_airplane
 from airport.tests.test_crew_api import sample_crew
-from airport.tests.test_route_api import sample_route
+from airport.tests.test_route_api import sample_airport, sample_route
+from airport.views import FlightViewSet
 
 # Create your tests here.
 FLIGHT_URL = reverse("airport:flights-list")
+SCHEDULE_URL = reverse("airport:flights-import-schedule")
+FLIGHT_EXPORT_URL = reverse("airport:flights-export")
 
 
 def sample_flight(**params) -> Flight:
@@ -112,6 +128,121 @@ class AuthorizedFlightApiTests(TestCase):
         self.assertIn(serializer2.data, res.data["results"])
         self.assertNotIn(serializer1.data, res.data["results"])
 
+    def test_flight_list_filter_by_departure_time(self):
+        flight1 = sample_flight(departure_time="2024-01-01T10:00:00Z")
+        flight2 = sample_flight(departure_time="2024-01-02T10:00:00Z")
+        flight3 = sample_flight(departure_time="2024-01-03T10:00:00Z")
+
+        res = self.client.get(
+            FLIGHT_URL,
+            {
+                "departure_after": "2024-01-02",
+                "departure_before": "2024-01-03T10:00:00Z",
+            },
+        )
+        ids = [flight["id"] for flight in res.data["results"]]
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn(flight1.id, ids)
+        self.assertIn(flight2.id, ids)
+        self.assertNotIn(flight3.id, ids)
+
+    def test_flight_list_filter_by_invalid_departure_time(self):
+        res = self.client.get(FLIGHT_URL, {"departure_after": "tomorrow"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_flight_list_filter_by_airports(self):
+        flight1 = sample_flight()
+        kyiv = sample_airport(name="Kyiv")
+        lisbon = sample_airport(name="Lisbon")
+        flight2 = sample_flight(
+            route=sample_route(source=kyiv, destination=lisbon)
+        )
+
+        by_source = self.client.get(FLIGHT_URL, {"source": kyiv.id})
+        by_destination = self.client.get(
+            FLIGHT_URL, {"destination": flight1.route.destination_id}
+        )
+
+        self.assertEqual(
+            [flight["id"] for flight in by_source.data["results"]],
+            [flight2.id],
+        )
+        self.assertEqual(
+            [flight["id"] for flight in by_destination.data["results"]],
+            [flight1.id],
+        )
+
+    def test_flight_list_query_count_does_not_grow(self):
+        def add_flight_with_ticket():
+            flight = sample_flight()
+            self.client.post(
+                reverse("airport:orders-list"),
+                {"tickets": [{"row": 1, "seat": 1, "flight": flight.id}]},
+                format="json",
+            )
+
+        add_flight_with_ticket()
+        with CaptureQueriesContext(connection) as single:
+            self.client.get(FLIGHT_URL)
+
+        for _ in range(4):
+            add_flight_with_ticket()
+        with CaptureQueriesContext(connection) as several:
+            res = self.client.get(FLIGHT_URL)
+
+        self.assertEqual(len(single), len(several))
+        self.assertEqual(len(res.data["results"]), 5)
+        for flight in res.data["results"]:
+            self.assertEqual(flight["available_places"], 39)
+
+    def test_flight_list_cursor_pagination(self):
+        flights = [
+            sample_flight(departure_time=f"2024-01-0{day}T00:00:00Z")
+            for day in (3, 1, 2, 1, 1, 2, 3)
+        ]
+        expected = [
+            flight.id
+            for flight in sorted(
+                flights, key=lambda flight: (flight.departure_time, flight.id)
+            )
+        ]
+
+        with CaptureQueriesContext(connection) as queries:
+            first = self.client.get(FLIGHT_URL, {"cursor": ""})
+        second = self.client.get(first.data["next"])
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertNotIn("count", first.data)
+        self.assertFalse(
+            any("COUNT(" in query["sql"] for query in queries.captured_queries)
+        )
+        self.assertIsNone(second.data["next"])
+        self.assertEqual(
+            [flight["id"] for flight in first.data["results"]]
+            + [flight["id"] for flight in second.data["results"]],
+            expected,
+        )
+
+    def test_flight_list_invalid_cursor(self):
+        res = self.client.get(FLIGHT_URL, {"cursor": "not-a-cursor"})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_flight_list_tampered_cursor(self):
+        for position in (
+            ["abc", 1],
+            [None, 1],
+            [["2024-01-01T00:00:00Z"], 1],
+            ["2024-01-01T00:00:00Z", "abc"],
+        ):
+            cursor = base64.urlsafe_b64encode(json.dumps(position).encode())
+            with self.subTest(position=position):
+                res = self.client.get(FLIGHT_URL, {"cursor": cursor.decode()})
+
+                self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
     def test_retrieve_flight_detail(self):
         flight = sample_flight()
         serializer = FlightRetrieveSerializer(flight)
@@ -123,6 +254,152 @@ class AuthorizedFlightApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data, serializer.data)
 
+    def test_flight_seat_map(self):
+        flight = sample_flight()
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(flight=flight, row=1, seat=1, order=order)
+        Ticket.objects.create(flight=flight, row=2, seat=4, order=order)
+        url = reverse("airport:flights-seat-map", args=[flight.id])
+
+        with self.assertNumQueries(3):
+            res = self.client.get(url)
+
+        bitmap = base64.b64decode(res.data["bitmap"])
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["available_places"], 38)
+        self.assertEqual(len(bitmap), 5)
+        self.assertEqual(bitmap[0], 0b10000001)
+        self.assertEqual(sum(bitmap[1:]), 0)
+
+    def test_flight_seat_map_expanded(self):
+        flight = sample_flight()
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(flight=flight, row=3, seat=2, order=order)
+        url = reverse("airport:flights-seat-map", args=[flight.id])
+
+        res = self.client.get(url, {"expand": "true"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["seats"]), 10)
+        self.assertEqual(res.data["seats"][2], [False, True, False, False])
+        self.assertNotIn("bitmap", res.data)
+
+    def test_hold_seats(self):
+        flight = sample_flight()
+        url = reverse("airport:flights-hold", args=[flight.id])
+
+        res = self.client.post(
+            url, {"seats": [{"row": 1, "seat": 1}]}, format="json"
+        )
+        seat_map = self.client.get(
+            reverse("airport:flights-seat-map", args=[flight.id])
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertIn("expires_at", res.data)
+        self.assertEqual(seat_map.data["available_places"], 39)
+
+    def test_hold_seats_held_by_another_user(self):
+        flight = sample_flight()
+        other = get_user_model().objects.create_user(
+            email="other@test.test", password="TESTPASSWORD"
+        )
+        SeatHold.objects.create(
+            flight=flight,
+            user=other,
+            row=1,
+            seat=1,
+            expires_at=timezone.now() + timedelta(minutes=5),
+        )
+        hold_url = reverse("airport:flights-hold", args=[flight.id])
+        ticket = {"row": 1, "seat": 1, "flight": flight.id}
+
+        hold = self.client.post(
+            hold_url, {"seats": [{"row": 1, "seat": 1}]}, format="json"
+        )
+        order = self.client.post(
+            reverse("airport:orders-list"), {"tickets": [ticket]}, "json"
+        )
+
+        self.assertEqual(hold.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(order.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_hold_expired_seats(self):
+        flight = sample_flight()
+        other = get_user_model().objects.create_user(
+            email="other@test.test", password="TESTPASSWORD"
+        )
+        SeatHold.objects.create(
+            flight=flight,
+            user=other,
+            row=1,
+            seat=1,
+            expires_at=timezone.now() - timedelta(seconds=1),
+        )
+        url = reverse("airport:flights-hold", args=[flight.id])
+
+        res = self.client.post(
+            url, {"seats": [{"row": 1, "seat": 1}]}, format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            SeatHold.objects.get(flight=flight).user_id, self.user.id
+        )
+
+    def test_order_held_seats(self):
+        flight = sample_flight()
+        self.client.post(
+            reverse("airport:flights-hold", args=[flight.id]),
+            {"seats": [{"row": 2, "seat": 3}]},
+            format="json",
+        )
+        ticket = {"row": 2, "seat": 3, "flight": flight.id}
+
+        res = self.client.post(
+            reverse("airport:orders-list"), {"tickets": [ticket]}, "json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(SeatHold.objects.exists())
+
+    def test_release_held_seats(self):
+        flight = sample_flight()
+        url = reverse("airport:flights-hold", args=[flight.id])
+        self.client.post(
+            url, {"seats": [{"row": 2, "seat": 3}]}, format="json"
+        )
+
+        res = self.client.delete(url)
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(SeatHold.objects.exists())
+
+    def test_flight_detail_not_modified(self):
+        flight = sample_flight()
+        url = reverse("airport:flights-detail", args=[flight.id])
+        etag = self.client.get(url)["ETag"]
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res["ETag"], etag)
+
+    def test_flight_list_etag_changes_when_seat_is_sold(self):
+        flight = sample_flight()
+        etag = self.client.get(FLIGHT_URL)["ETag"]
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(row=1, seat=1, flight=flight, order=order)
+        Flight.objects.filter(id=flight.id).update(
+            tickets_sold=1, updated_at=timezone.now() + timedelta(seconds=1)
+        )
+
+        res = self.client.get(FLIGHT_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+        self.assertEqual(res.data["results"][0]["available_places"], 39)
+
     def test_create_flight_forbidden(self):
         route = sample_route()
         airplane = sample_airplane()
@@ -139,6 +416,242 @@ class AuthorizedFlightApiTests(TestCase):
 
         self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
 
+    def test_export_flights_forbidden(self):
+        res = self.client.get(FLIGHT_EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_import_schedule_forbidden(self):
+        res = self.client.post(
+            SCHEDULE_URL,
+            "route,airplane,departure_time,arrival_time,crew\n",
+            content_type="text/csv",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+
+def flight_index_name(*fields) -> str:
+    return next(
+        index.name
+        for index in Flight._meta.indexes
+        if index.fields == list(fields)
+    )
+
+
+class FlightIndexUsageTests(TestCase):
+    """The flight list filters are answered by their own indexes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        airports = [sample_airport(name=f"Airport {n}") for n in range(2)]
+        cls.routes = [
+            sample_route(source=airports[0], destination=airports[1])
+            for _ in range(50)
+        ]
+        cls.airplanes = [sample_airplane() for _ in range(50)]
+        start = datetime.fromisoformat("2024-01-01T00:00:00+00:00")
+        # departures in no particular order on disk, as after a while of
+        # scheduling, and every third hour over a few years
+        hours = [3 * (number * 7919 % 10_000) for number in range(10_000)]
+        Flight.objects.bulk_create(
+            Flight(
+                route=cls.routes[number % 50],
+                airplane=cls.airplanes[number * 7 % 50],
+                departure_time=start + timedelta(hours=hour),
+                arrival_time=start + timedelta(hours=hour + 2),
+            )
+            for number, hour in enumerate(hours)
+        )
+        # plans of a table the planner knows nothing about prefer scans
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def explain_flight_list(self, **params):
+        request = APIRequestFactory().get(FLIGHT_URL, params)
+        view = FlightViewSet(request=Request(request), action="list")
+        return view.get_queryset().explain()
+
+    def assertUsesIndex(self, plan, *fields):
+        self.assertIn(flight_index_name(*fields), plan)
+
+    def test_departure_time_filter_uses_index(self):
+        plan = self.explain_flight_list(
+            departure_after="2024-01-01", departure_before="2024-01-15"
+        )
+
+        self.assertUsesIndex(plan, "departure_time")
+
+    def test_route_and_departure_time_filter_uses_index(self):
+        plan = self.explain_flight_list(
+            route=f"{self.routes[0].id},{self.routes[1].id}",
+            departure_after="2025-01-01",
+            departure_before="2025-02-01",
+        )
+
+        self.assertUsesIndex(plan, "route", "departure_time")
+
+    def test_airplane_and_departure_time_filter_uses_index(self):
+        plan = self.explain_flight_list(
+            airplane=str(self.airplanes[0].id),
+            departure_after="2025-01-01",
+            departure_before="2025-02-01",
+        )
+
+        self.assertUsesIndex(plan, "airplane", "departure_time")
+
+
+class ConnectionSearchApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.test", password="TESTPASSWORD"
+        )
+        self.client.force_authenticate(self.user)
+        flight_index.invalidate()
+
+        self.kyiv = sample_airport(name="Kyiv")
+        self.warsaw = sample_airport(name="Warsaw")
+        self.lisbon = sample_airport(name="Lisbon")
+        to_warsaw = sample_route(source=self.kyiv, destination=self.warsaw)
+        self.to_lisbon = sample_route(
+            source=self.warsaw, destination=self.lisbon
+        )
+        direct = sample_route(source=self.kyiv, destination=self.lisbon)
+
+        self.first_leg = sample_flight(
+            route=to_warsaw,
+            departure_time="2024-01-01T08:00:00Z",
+            arrival_time="2024-01-01T10:00:00Z",
+        )
+        sample_flight(
+            route=self.to_lisbon,
+            departure_time="2024-01-01T10:30:00Z",
+            arrival_time="2024-01-01T12:00:00Z",
+        )
+        self.second_leg = sample_flight(
+            route=self.to_lisbon,
+            departure_time="2024-01-01T11:30:00Z",
+            arrival_time="2024-01-01T13:00:00Z",
+        )
+        self.direct = sample_flight(
+            route=direct,
+            departure_time="2024-01-01T09:00:00Z",
+            arrival_time="2024-01-01T14:00:00Z",
+        )
+
+    def search(self, **params):
+        params = {
+            "source": self.kyiv.id,
+            "destination": self.lisbon.id,
+            "departure_after": "2024-01-01T00:00:00Z",
+            **params,
+        }
+        return self.client.get(reverse("airport:flights-connections"), params)
+
+    def test_search_connections(self):
+        res = self.search()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 2)
+        self.assertEqual(res.data[0]["connections"], 1)
+        self.assertEqual(
+            [leg["flight"] for leg in res.data[0]["flights"]],
+            [self.first_leg.id, self.second_leg.id],
+        )
+        self.assertEqual(res.data[1]["flights"][0]["flight"], self.direct.id)
+
+    def test_search_direct_flights(self):
+        res = self.search(max_connections=0)
+
+        self.assertEqual(len(res.data), 1)
+        self.assertEqual(res.data[0]["connections"], 0)
+
+    def test_search_connections_respects_layover(self):
+        res = self.search(min_layover=120)
+
+        self.assertEqual(len(res.data), 1)
+        self.assertEqual(res.data[0]["flights"][0]["flight"], self.direct.id)
+
+    def test_search_connections_sees_new_flights(self):
+        self.search()
+        with self.captureOnCommitCallbacks(execute=True):
+            flight = Flight.objects.create(
+                route=self.to_lisbon,
+                airplane=self.first_leg.airplane,
+                departure_time="2024-01-01T11:00:00Z",
+                arrival_time="2024-01-01T12:30:00Z",
+            )
+
+        res = self.search()
+
+        self.assertEqual(res.data[0]["flights"][1]["flight"], flight.id)
+        # the change was applied without loading the index again
+        self.assertEqual(flight_index.version, model_versions(INDEX_MODELS))
+
+    def test_search_connections_applies_flights_created_with_crew(self):
+        self.search()
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(
+                email="admin@test.test", password="TESTPASSWORD", is_staff=True
+            )
+        )
+        payload = {
+            "route": self.to_lisbon.id,
+            "airplane": self.first_leg.airplane.id,
+            "crew": [sample_crew().id],
+            "departure_time": "2024-01-01T11:00:00Z",
+            "arrival_time": "2024-01-01T12:30:00Z",
+        }
+        with self.captureOnCommitCallbacks(execute=True):
+            flight_id = self.client.post(FLIGHT_URL, payload).data["id"]
+
+        with mock.patch.object(
+            flight_index, "build", wraps=flight_index.build
+        ) as build:
+            res = self.search()
+
+        self.assertEqual(res.data[0]["flights"][1]["flight"], flight_id)
+        build.assert_not_called()
+
+    def test_search_connections_ignores_rolled_back_flights(self):
+        self.search()
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                Flight.objects.create(
+                    route=self.to_lisbon,
+                    airplane=self.first_leg.airplane,
+                    departure_time="2024-01-01T11:00:00Z",
+                    arrival_time="2024-01-01T12:30:00Z",
+                )
+                transaction.set_rollback(True)
+
+        res = self.search()
+
+        self.assertEqual(
+            res.data[0]["flights"][1]["flight"], self.second_leg.id
+        )
+
+    def test_search_connections_sees_changes_of_other_processes(self):
+        self.search()
+        Flight.objects.filter(id=self.second_leg.id).update(
+            arrival_time="2024-01-01T12:30:00Z"
+        )
+        bump_model_version(Flight)
+
+        res = self.search()
+
+        self.assertEqual(
+            [leg["flight"] for leg in res.data[0]["flights"]],
+            [self.first_leg.id, self.second_leg.id],
+        )
+        self.assertEqual(res.data[0]["arrival_time"], "2024-01-01T12:30:00Z")
+
+    def test_search_connections_without_airports(self):
+        res = self.client.get(reverse("airport:flights-connections"))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
 
 class AdminUserFlightApiTests(TestCase):
     def setUp(self):
@@ -182,3 +695,159 @@ class AdminUserFlightApiTests(TestCase):
         )
 
         self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_import_schedule_csv(self):
+        route = sample_route()
+        airplane = sample_airplane()
+        crew = [sample_crew(), sample_crew()]
+        schedule = (
+            "route,airplane,departure_time,arrival_time,crew\n"
+            f"{route.id},{airplane.id},2030-01-01T10:00:00Z,"
+            f"2030-01-01T12:00:00Z,{crew[0].id} {crew[1].id}\n"
+            f"{route.id},{airplane.id},2030-01-02T10:00:00Z,"
+            "2030-01-02T12:00:00Z,\n"
+            f"{route.id},0,2030-01-03T10:00:00Z,2030-01-03T12:00:00Z,\n"
+            f"999,{airplane.id},2030-01-04T10:00:00Z,"
+            f"2030-01-04T12:00:00Z,999\n"
+            f"{route.id},{airplane.id},2030-01-05T10:00:00Z,"
+            "2030-01-05T08:00:00Z,\n"
+        )
+
+        res = self.client.post(SCHEDULE_URL, schedule, content_type="text/csv")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["created"], 2)
+        self.assertEqual(res.data["failed"], 3)
+        self.assertEqual(
+            [error["line"] for error in res.data["errors"]], [4, 5, 6]
+        )
+        self.assertIn("airplane", res.data["errors"][0]["errors"])
+        self.assertEqual(
+            set(res.data["errors"][1]["errors"]), {"route", "crew"}
+        )
+        self.assertIn("non_field_errors", res.data["errors"][2]["errors"])
+        flight = Flight.objects.get(departure_time="2030-01-01T10:00:00Z")
+        self.assertEqual(
+            set(flight.crew.values_list("id", flat=True)),
+            {member.id for member in crew},
+        )
+
+    def test_import_schedule_ndjson(self):
+        route = sample_route()
+        airplane = sample_airplane()
+        crew = sample_crew()
+        row = {
+            "route": route.id,
+            "airplane": airplane.id,
+            "departure_time": "2030-01-01T10:00:00Z",
+            "arrival_time": "2030-01-01T12:00:00Z",
+            "crew": [crew.id],
+        }
+        schedule = f"{json.dumps(row)}\n{{not json\n\n{json.dumps(row)}\n"
+
+        res = self.client.post(
+            SCHEDULE_URL, schedule, content_type="application/x-ndjson"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["created"], 2)
+        self.assertEqual(res.data["errors"][0]["line"], 2)
+        self.assertEqual(crew.flights.count(), 2)
+
+    def test_import_schedule_queries_do_not_grow(self):
+        route = sample_route()
+        airplane = sample_airplane()
+        crew = sample_crew()
+
+        def import_flights(count):
+            schedule = "".join(
+                json.dumps(
+                    {
+                        "route": route.id,
+                        "airplane": airplane.id,
+                        "departure_time": f"2030-01-{day:02d}T10:00:00Z",
+                        "arrival_time": f"2030-01-{day:02d}T12:00:00Z",
+                        "crew": [crew.id],
+                    }
+                )
+                + "\n"
+                for day in range(1, count + 1)
+            )
+            with CaptureQueriesContext(connection) as queries:
+                res = self.client.post(
+                    SCHEDULE_URL,
+                    schedule,
+                    content_type="application/x-ndjson",
+                )
+            self.assertEqual(res.data["created"], count)
+            return len(queries)
+
+        self.assertEqual(import_flights(2), import_flights(20))
+        self.assertEqual(Flight.objects.count(), 22)
+
+    def test_import_schedule_sees_new_flights_in_search(self):
+        route = sample_route()
+        airplane = sample_airplane()
+        search = {
+            "source": route.source_id,
+            "destination": route.destination_id,
+            "departure_after": "2030-01-01T00:00:00Z",
+        }
+        connections_url = reverse("airport:flights-connections")
+        self.assertEqual(self.client.get(connections_url, search).data, [])
+        row = {
+            "route": route.id,
+            "airplane": airplane.id,
+            "departure_time": "2030-01-01T10:00:00Z",
+            "arrival_time": "2030-01-01T12:00:00Z",
+        }
+
+        self.client.post(
+            SCHEDULE_URL, json.dumps(row), content_type="application/x-ndjson"
+        )
+
+        res = self.client.get(connections_url, search)
+        self.assertEqual(len(res.data), 1)
+
+    def test_export_flights_csv(self):
+        flight = sample_flight(departure_time="2030-01-01T10:00:00Z")
+        sample_flight(departure_time="2030-02-01T10:00:00Z")
+
+        res = self.client.get(
+            FLIGHT_EXPORT_URL, {"departure_before": "2030-01-02"}
+        )
+        rows = list(
+            csv.reader(b"".join(res.streaming_content).decode().splitlines())
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "text/csv")
+        self.assertEqual(rows[0][:3], ["id", "route", "source"])
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(
+            rows[1][:3],
+            [
+                str(flight.id),
+                str(flight.route_id),
+                str(flight.route.source_id),
+            ],
+        )
+
+    def test_export_flights_ndjson(self):
+        flight = sample_flight(departure_time="2030-01-01T10:00:00Z")
+
+        res = self.client.get(FLIGHT_EXPORT_URL, {"output": "ndjson"})
+        rows = [
+            json.loads(line)
+            for line in b"".join(res.streaming_content).splitlines()
+        ]
+
+        self.assertEqual(res["Content-Type"], "application/x-ndjson")
+        self.assertEqual(rows[0]["id"], flight.id)
+        self.assertEqual(rows[0]["departure_time"], "2030-01-01T10:00:00Z")
+        self.assertEqual(rows[0]["tickets_sold"], 0)
+
+    def test_export_flights_invalid_output(self):
+        res = self.client.get(FLIGHT_EXPORT_URL, {"output": "xml"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
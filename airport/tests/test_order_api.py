@@ -1,18 +1,34 @@
+import base64
+import json
+import threading
+from io import StringIO
+from unittest import mock, skipUnless
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.management import call_command, CommandError
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.test import AsyncClient, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.reverse import reverse
 from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
 
-from airport.models import Order, Ticket
+from airport.management.commands.import_fixture import fixture_objects
+from airport.models import Flight, Order, Ticket
 from airport.serializers import (
     OrderListSerializer,
     OrderRetrieveSerializer,
 )
+from airport.tests.test_airplane_api import sample_airplane
 from airport.tests.test_flight_api import sample_flight
 
 # Create your tests here.
 ORDER_URL = reverse("airport:orders-list")
+ORDER_EXPORT_URL = reverse("airport:orders-export")
+TICKET_EXPORT_URL = reverse("airport:orders-export-tickets")
 
 
 class UnauthorizedOrderApiTests(TestCase):
@@ -56,10 +72,31 @@ class OrderApiTests(TestCase):
             "00:00:00+00:00, arrival: 2023-01-01 00:00:00+00:00",
         )
 
+    def test_get_order_list_with_cursor(self):
+        orders = [Order.objects.create(user=self.user) for _ in range(6)]
+
+        first = self.client.get(ORDER_URL, {"cursor": "", "page_size": 4})
+        second = self.client.get(first.data["next"])
+
+        self.assertEqual(
+            [order["id"] for order in first.data["results"]]
+            + [order["id"] for order in second.data["results"]],
+            [order.id for order in reversed([self.order] + orders)],
+        )
+
+    def test_get_order_list_with_tampered_cursor(self):
+        for position in (["abc", 1], [None, 1]):
+            cursor = base64.urlsafe_b64encode(json.dumps(position).encode())
+            with self.subTest(position=position):
+                res = self.client.get(ORDER_URL, {"cursor": cursor.decode()})
+
+                self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
     def test_get_order_detail(self):
-        res = self.client.get(reverse("airport:orders-detail", args=[1]))
-        order = Order.objects.get(id=1)
-        serializer = OrderRetrieveSerializer(order)
+        res = self.client.get(
+            reverse("airport:orders-detail", args=[self.order.id])
+        )
+        serializer = OrderRetrieveSerializer(self.order)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data, serializer.data)
@@ -67,3 +104,429 @@ class OrderApiTests(TestCase):
         self.assertEqual(flight_info[1], "route")
         self.assertEqual(flight_info[2], "airplane")
         self.assertEqual(flight_info[3], "crew")
+
+    def add_tickets(self, count):
+        second_flight = Flight.objects.create(
+            route=self.flight.route,
+            airplane=self.flight.airplane,
+            departure_time="2023-01-02T00:00:00Z",
+            arrival_time="2023-01-02T00:00:00Z",
+        )
+        second_flight.crew.add(*self.flight.crew.all())
+        Ticket.objects.bulk_create(
+            Ticket(
+                flight=(self.flight, second_flight)[number % 2],
+                row=3 + number // 4,
+                seat=1 + number % 4,
+                order=self.order,
+            )
+            for number in range(count)
+        )
+
+    def test_get_order_list_query_count_does_not_grow(self):
+        self.add_tickets(20)
+
+        with self.assertNumQueries(5):
+            res = self.client.get(ORDER_URL)
+
+        self.assertEqual(len(res.data["results"][0]["tickets"]), 21)
+
+    def test_get_order_detail_query_count_does_not_grow(self):
+        self.add_tickets(20)
+        url = reverse("airport:orders-detail", args=[self.order.id])
+
+        with self.assertNumQueries(5):
+            res = self.client.get(url)
+
+        tickets = res.data["tickets"]
+        self.assertEqual(len(tickets), 21)
+        self.assertEqual(tickets[0]["flight"], tickets[1]["flight"])
+        self.assertEqual(tickets[0]["flight"]["crew"], ["Test Test"])
+
+    def test_create_order(self):
+        payload = {
+            "tickets": [
+                {"row": 1, "seat": 1, "flight": self.flight.id},
+                {"row": 1, "seat": 2, "flight": self.flight.id},
+            ]
+        }
+        res = self.client.post(ORDER_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Ticket.objects.filter(flight=self.flight).count(), 3)
+
+    def test_create_order_query_count_does_not_grow(self):
+        flight = sample_flight(
+            airplane=sample_airplane(rows=10, seats_in_row=6)
+        )
+
+        def order_payload(seats):
+            return {
+                "tickets": [
+                    {"row": row, "seat": seat, "flight": flight.id}
+                    for row, seat in seats
+                ]
+            }
+
+        with CaptureQueriesContext(connection) as single:
+            self.client.post(ORDER_URL, order_payload([(1, 1)]), "json")
+
+        group = [(row, seat) for row in range(2, 11) for seat in range(1, 7)]
+        with CaptureQueriesContext(connection) as many:
+            res = self.client.post(ORDER_URL, order_payload(group), "json")
+        flight.refresh_from_db()
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data["tickets"]), 54)
+        self.assertEqual(len(single), len(many))
+        self.assertEqual(flight.tickets_sold, 55)
+
+    def test_create_order_with_taken_seat(self):
+        payload = {
+            "tickets": [{"row": 2, "seat": 1, "flight": self.flight.id}]
+        }
+        res = self.client.post(ORDER_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Ticket.objects.count(), 1)
+
+    def test_create_order_with_repeated_seat(self):
+        ticket = {"row": 3, "seat": 1, "flight": self.flight.id}
+        res = self.client.post(
+            ORDER_URL, {"tickets": [ticket, ticket]}, format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_create_order_with_invalid_seat(self):
+        payload = {
+            "tickets": [{"row": 1, "seat": 9, "flight": self.flight.id}]
+        }
+        res = self.client.post(ORDER_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_create_order_with_auto_seats(self):
+        payload = {"auto_seats": [{"flight": self.flight.id, "count": 3}]}
+        first = self.client.post(ORDER_URL, payload, format="json")
+        second = self.client.post(ORDER_URL, payload, format="json")
+        self.flight.refresh_from_db()
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [(t["row"], t["seat"]) for t in first.data["tickets"]],
+            [(1, 1), (1, 2), (1, 3)],
+        )
+        self.assertEqual(
+            [(t["row"], t["seat"]) for t in second.data["tickets"]],
+            [(2, 2), (2, 3), (2, 4)],
+        )
+        self.assertEqual(self.flight.tickets_sold, 7)
+
+    def test_create_order_with_auto_seats_retries_taken_seats(self):
+        payload = {"auto_seats": [{"flight": self.flight.id, "count": 1}]}
+        with mock.patch(
+            "airport.serializers.find_seats", side_effect=[[(2, 1)], [(3, 1)]]
+        ):
+            res = self.client.post(ORDER_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data["tickets"][0]["row"], 3)
+
+    def test_create_order_with_too_many_auto_seats(self):
+        payload = {"auto_seats": [{"flight": self.flight.id, "count": 40}]}
+        res = self.client.post(ORDER_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Ticket.objects.count(), 1)
+
+    def test_create_empty_order(self):
+        res = self.client.post(ORDER_URL, {"tickets": []}, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_create_order_updates_seat_counter(self):
+        payload = {
+            "tickets": [{"row": 3, "seat": 1, "flight": self.flight.id}]
+        }
+        self.client.post(ORDER_URL, payload, format="json")
+        self.flight.refresh_from_db()
+
+        self.assertEqual(self.flight.tickets_sold, 2)
+        self.assertEqual(self.flight.available_places, 38)
+
+    def test_delete_order_releases_seats(self):
+        payload = {
+            "tickets": [{"row": 3, "seat": 1, "flight": self.flight.id}]
+        }
+        res = self.client.post(ORDER_URL, payload, format="json")
+        self.client.delete(
+            reverse("airport:orders-detail", args=[res.data["id"]])
+        )
+        self.flight.refresh_from_db()
+
+        self.assertEqual(self.flight.tickets_sold, 1)
+
+    def test_ticket_signals_keep_seat_counter(self):
+        other_flight = sample_flight()
+        ticket = Ticket.objects.create(
+            flight=self.flight, row=3, seat=1, order=self.order
+        )
+        ticket.flight = other_flight
+        ticket.save()
+        self.ticket.delete()
+        self.flight.refresh_from_db()
+        other_flight.refresh_from_db()
+
+        self.assertEqual(self.flight.tickets_sold, 0)
+        self.assertEqual(other_flight.tickets_sold, 1)
+        call_command("rebuild_seat_inventory", "--check", stdout=StringIO())
+
+    def test_rebuild_seat_inventory(self):
+        Flight.objects.update(tickets_sold=5)
+        with self.assertRaises(CommandError):
+            call_command(
+                "rebuild_seat_inventory", "--check", stdout=StringIO()
+            )
+
+        call_command("rebuild_seat_inventory", stdout=StringIO())
+        self.flight.refresh_from_db()
+
+        self.assertEqual(self.flight.tickets_sold, 1)
+        call_command("rebuild_seat_inventory", "--check", stdout=StringIO())
+
+    def test_generate_data(self):
+        call_command("rebuild_seat_inventory", stdout=StringIO())
+        out = StringIO()
+        call_command(
+            "generate_data",
+            "--airports=5",
+            "--flights=30",
+            "--tickets=250",
+            "--chunk-size=7",
+            stdout=out,
+        )
+
+        self.assertIn("Generated 5 airports, 20 routes", out.getvalue())
+        self.assertEqual(Flight.objects.count(), 31)
+        self.assertEqual(Ticket.objects.count(), 251)
+        self.assertEqual(Order.objects.count(), 64)
+        self.assertFalse(
+            Ticket.objects.filter(
+                Q(row__gt=F("flight__airplane__rows"))
+                | Q(seat__gt=F("flight__airplane__seats_in_row"))
+            ).exists()
+        )
+        call_command("rebuild_seat_inventory", "--check", stdout=StringIO())
+
+    def test_generate_data_with_too_many_tickets(self):
+        with self.assertRaises(CommandError):
+            call_command(
+                "generate_data",
+                "--flights=1",
+                "--tickets=81",
+                stdout=StringIO(),
+            )
+
+
+@skipUnless(connection.vendor == "postgresql", "Needs PostgreSQL row locks")
+class ConcurrentSeatAssignmentTests(TransactionTestCase):
+    def setUp(self):
+        self.flight = sample_flight()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.test", password="TESTPASSWORD"
+        )
+
+    def test_orders_do_not_wait_for_each_other(self):
+        claimed = threading.Event()
+        release = threading.Event()
+
+        def hold_front_row():
+            try:
+                with transaction.atomic():
+                    order = Order.objects.create(user=self.user)
+                    OrderListSerializer.assign_seats(
+                        order,
+                        {"flight": self.flight, "count": 2, "adjacent": True},
+                    )
+                    claimed.set()
+                    release.wait(10)
+            finally:
+                connection.close()
+
+        holder = threading.Thread(target=hold_front_row)
+        holder.start()
+        try:
+            claimed.wait(10)
+            client = APIClient()
+            client.force_authenticate(self.user)
+            res = client.post(
+                ORDER_URL,
+                {"auto_seats": [{"flight": self.flight.id, "count": 2}]},
+                format="json",
+            )
+        finally:
+            release.set()
+            holder.join()
+
+        # row 1 is claimed by the open order, so the request skips it
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [(t["row"], t["seat"]) for t in res.data["tickets"]],
+            [(2, 1), (2, 2)],
+        )
+        self.assertEqual(Ticket.objects.filter(row=1).count(), 2)
+
+
+@skipUnless(connection.vendor == "postgresql", "Needs worker processes")
+class GenerateDataWorkersTests(TransactionTestCase):
+    def test_generate_data_with_workers(self):
+        Flight.objects.exists()
+
+        call_command(
+            "generate_data",
+            "--airports=5",
+            "--flights=30",
+            "--tickets=250",
+            "--chunk-size=7",
+            "--workers=2",
+            stdout=StringIO(),
+        )
+
+        # the connection of this process survives the forked workers
+        self.assertEqual(Flight.objects.count(), 30)
+        self.assertEqual(Ticket.objects.count(), 250)
+        call_command("rebuild_seat_inventory", "--check", stdout=StringIO())
+
+
+class OrderExportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_user(
+            email="admin@test.test", password="TESTPASSWORD", is_staff=True
+        )
+        self.client.force_authenticate(self.admin)
+        self.user = get_user_model().objects.create_user(
+            email="test@test.test", password="TESTPASSWORD"
+        )
+        self.flight = sample_flight()
+        self.order = Order.objects.create(user=self.user)
+        Ticket.objects.create(
+            flight=self.flight, row=1, seat=1, order=self.order
+        )
+        Ticket.objects.create(
+            flight=self.flight, row=1, seat=2, order=self.order
+        )
+
+    def export(self, url, **params):
+        res = self.client.get(url, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [
+            json.loads(line)
+            for line in b"".join(res.streaming_content).splitlines()
+        ]
+
+    async def test_export_is_async_under_asgi(self):
+        token = RefreshToken.for_user(self.admin).access_token
+
+        res = await AsyncClient().get(
+            TICKET_EXPORT_URL,
+            {"output": "ndjson"},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        # a sync iterator would have been read whole before sending
+        self.assertTrue(res.is_async)
+        lines = b"".join([chunk async for chunk in res.streaming_content])
+        self.assertEqual(len(lines.splitlines()), 2)
+
+    def test_export_orders(self):
+        rows = self.export(ORDER_EXPORT_URL, output="ndjson")
+
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["id"], self.order.id)
+        self.assertEqual(rows[0]["email"], self.user.email)
+        self.assertEqual(rows[0]["tickets"], 2)
+
+    def test_export_tickets_by_creation_time(self):
+        old_order = Order.objects.create(user=self.user)
+        Ticket.objects.create(
+            flight=sample_flight(), row=1, seat=1, order=old_order
+        )
+        Order.objects.filter(pk=old_order.pk).update(
+            created_at="2020-01-01T00:00:00Z"
+        )
+
+        rows = self.export(
+            TICKET_EXPORT_URL, output="ndjson", created_after="2021-01-01"
+        )
+
+        self.assertEqual(len(rows), 2)
+        self.assertEqual({row["order"] for row in rows}, {self.order.id})
+        self.assertEqual(rows[0]["flight"], self.flight.id)
+
+    def test_export_tickets_csv_header(self):
+        res = self.client.get(TICKET_EXPORT_URL)
+        lines = b"".join(res.streaming_content).decode().splitlines()
+
+        self.assertTrue(res.streaming)
+        self.assertEqual(
+            lines[0], "id,order,created_at,user,flight,departure_time,row,seat"
+        )
+        self.assertEqual(len(lines), 3)
+
+    def test_export_forbidden(self):
+        self.client.force_authenticate(self.user)
+
+        for url in (ORDER_EXPORT_URL, TICKET_EXPORT_URL):
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class ImportFixtureTests(TestCase):
+    def test_fixture_objects_across_reads(self):
+        stream = StringIO('[{"pk": 1, "name": "a]b"},\n {"pk": 2}\n]')
+
+        objects = list(fixture_objects(stream, read_size=5))
+
+        self.assertEqual(objects, [{"pk": 1, "name": "a]b"}, {"pk": 2}])
+
+    def test_import_data_json(self):
+        # the orders of data.json belong to user 1
+        user = get_user_model().objects.create_user(
+            id=1, email="test@test.test", password="TESTPASSWORD"
+        )
+        out = StringIO()
+        call_command(
+            "import_fixture",
+            settings.BASE_DIR / "data.json",
+            "--batch-size=3",
+            stdout=out,
+        )
+
+        self.assertIn("Imported 208 objects", out.getvalue())
+        self.assertEqual(Flight.objects.count(), 14)
+        self.assertEqual(Flight.crew.through.objects.count(), 14)
+        self.assertEqual(Order.objects.filter(user=user).count(), 13)
+        self.assertEqual(Ticket.objects.count(), 20)
+        self.assertEqual(
+            Flight.objects.get(pk=11).tickets_sold,
+            Ticket.objects.filter(flight_id=11).count(),
+        )
+        # sequences continue after the imported primary keys
+        self.assertEqual(Order.objects.create(user=user).pk, 15)
+
+    def test_import_into_filled_database(self):
+        get_user_model().objects.create_user(
+            id=1, email="test@test.test", password="TESTPASSWORD"
+        )
+        # data.json has a flight 1 too
+        sample_flight(id=1)
+
+        with self.assertRaises(CommandError):
+            call_command(
+                "import_fixture",
+                settings.BASE_DIR / "data.json",
+                stdout=StringIO(),
+            )
@@ -0,0 +1,73 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from airport.pools import pool_metrics, pooled_aliases
+
+POOL_URL = reverse("airport:database-pools")
+
+
+class PoolMetricsTests(TestCase):
+    def test_pool_metrics(self):
+        stats = {
+            "pool_min": 2,
+            "pool_max": 10,
+            "pool_size": 6,
+            "pool_available": 1,
+            "requests_waiting": 3,
+            "requests_num": 120,
+            "requests_queued": 4,
+            "requests_wait_ms": 50,
+            "connections_num": 6,
+        }
+
+        metrics = pool_metrics("default", stats)
+
+        self.assertEqual(metrics["in_use"], 5)
+        self.assertEqual(metrics["saturation"], 0.5)
+        self.assertEqual(metrics["waiting"], 3)
+        self.assertEqual(metrics["average_wait_ms"], 12.5)
+        self.assertEqual(metrics["timeouts"], 0)
+
+    def test_pool_metrics_without_requests(self):
+        stats = {
+            "pool_min": 2,
+            "pool_max": 4,
+            "pool_size": 2,
+            "pool_available": 2,
+        }
+
+        metrics = pool_metrics("default", stats)
+
+        self.assertEqual(metrics["saturation"], 0)
+        self.assertEqual(metrics["average_wait_ms"], 0)
+
+
+class DatabasePoolApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_database_pools_for_admin(self):
+        admin = get_user_model().objects.create_user(
+            email="admin@test.test", password="TESTPASSWORD", is_staff=True
+        )
+        self.client.force_authenticate(admin)
+
+        res = self.client.get(POOL_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [pool["alias"] for pool in res.data], pooled_aliases()
+        )
+
+    def test_database_pools_forbidden(self):
+        user = get_user_model().objects.create_user(
+            email="test@test.test", password="TESTPASSWORD"
+        )
+        self.client.force_authenticate(user)
+
+        res = self.client.get(POOL_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
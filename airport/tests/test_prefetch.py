@@ -0,0 +1,96 @@
+from unittest import mock
+
+from django.core import checks
+from django.test import TestCase
+from rest_framework import serializers, viewsets
+
+from airport.models import Flight, Order
+from airport.prefetch import (
+    SerializerPlan,
+    plan_queryset,
+    relation_lookups,
+    serializer_plan,
+)
+from airport.serializers import (
+    FlightListSerializer,
+    OrderRetrieveSerializer,
+    RouteRetrieveSerializer,
+)
+from airport.urls import router
+
+
+class FlightWithLegsSerializer(serializers.ModelSerializer):
+    legs = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Flight
+        fields = ("id", "legs")
+
+    def get_legs(self, flight):
+        return []
+
+
+class LazyFlightViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = Flight.objects.all()
+    serializer_class = FlightListSerializer
+
+
+class SerializerPlanTests(TestCase):
+    def test_plan_follows_sources_and_model_hints(self):
+        plan = serializer_plan(FlightListSerializer)
+
+        self.assertEqual(
+            set(relation_lookups(plan.relations)),
+            {"route", "route__source", "route__destination", "airplane"},
+        )
+
+    def test_plan_reads_back_references_from_parent(self):
+        plan = serializer_plan(RouteRetrieveSerializer)
+
+        self.assertEqual(
+            set(relation_lookups(plan.relations)),
+            {"source", "destination", "flights"},
+        )
+
+    def test_plan_keeps_prefetched_relations_separate(self):
+        queryset = plan_queryset(
+            Order.objects.prefetch_related("tickets__flight"),
+            serializer_plan(OrderRetrieveSerializer).relations,
+        )
+
+        (tickets,) = queryset._prefetch_related_lookups
+        (flight,) = tickets.queryset._prefetch_related_lookups
+        (crew,) = flight.queryset._prefetch_related_lookups
+        self.assertEqual(
+            flight.queryset.query.select_related,
+            {
+                "route": {"source": {}, "destination": {}},
+                "airplane": {"airplane_type": {}},
+            },
+        )
+        self.assertEqual(crew.prefetch_to, "crew")
+
+    def test_method_fields_are_unresolved(self):
+        plan = SerializerPlan(FlightWithLegsSerializer)
+
+        self.assertEqual(plan.unresolved, ["legs"])
+
+
+class SerializerRelationsCheckTests(TestCase):
+    def test_airport_api_has_no_warnings(self):
+        self.assertEqual(checks.run_checks(), [])
+
+    def test_lazy_loads_are_reported(self):
+        with mock.patch.object(
+            router, "registry", [("lazy", LazyFlightViewSet, "lazy")]
+        ):
+            warnings = checks.run_checks()
+
+        self.assertEqual(
+            {warning.id for warning in warnings}, {"airport.W002"}
+        )
+        self.assertIn(
+            "FlightListSerializer reads 'route__source', which the list "
+            "queryset loads lazily.",
+            [warning.msg for warning in warnings],
+        )
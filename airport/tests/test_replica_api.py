@@ -0,0 +1,142 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Crew,
+    Flight,
+    Route,
+)
+from airport.replicas import ReplicaRouter, read_from_replica
+from airport.tests.test_crew_api import sample_crew
+from airport.tests.test_flight_api import FLIGHT_URL, sample_flight
+from airport.tests.test_order_api import ORDER_URL
+
+REPLICA = "lagging_replica"
+
+
+def add_lagging_replica():
+    """
+    Register a second local database that stands in for a replica.
+    Nothing reaches it until `replicate` copies rows, which simulates
+    replication lag.
+    """
+    if REPLICA in connections.settings:
+        return
+    default = settings.DATABASES["default"]
+    database = {**default, "TEST": {}}
+    if default["ENGINE"] != "django.db.backends.sqlite3":
+        database["TEST"] = {"NAME": f"test_{default['NAME']}_replica"}
+    connections.settings[REPLICA] = connections.configure_settings(
+        {"default": default, REPLICA: database}
+    )[REPLICA]
+
+
+# the test runner creates the databases of the aliases it finds when
+# the test modules are loaded
+add_lagging_replica()
+
+REPLICATED_MODELS = (
+    get_user_model(),
+    AirplaneType,
+    Airplane,
+    Airport,
+    Crew,
+    Route,
+    Flight,
+    Flight.crew.through,
+)
+
+
+def replicate():
+    """Copy the rows the replica is missing, as replication would."""
+    for model in REPLICATED_MODELS:
+        model.objects.using(REPLICA).bulk_create(
+            model.objects.using("default").all(), ignore_conflicts=True
+        )
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA])
+class ReplicaReadTests(TestCase):
+    databases = {"default", REPLICA}
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.test", password="TESTPASSWORD"
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_list_reads_replica(self):
+        sample_flight()
+
+        res = self.client.get(FLIGHT_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["results"], [])
+
+        replicate()
+        res = self.client.get(FLIGHT_URL)
+        self.assertEqual(len(res.data["results"]), 1)
+
+    def test_reads_after_own_write_use_primary(self):
+        flight = sample_flight()
+        replicate()
+
+        res = self.client.post(
+            ORDER_URL,
+            {"tickets": [{"row": 1, "seat": 1, "flight": flight.id}]},
+            format="json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        detail_url = reverse("airport:orders-detail", args=[res.data["id"]])
+
+        res = self.client.get(detail_url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        # without the pin the order has not reached the replica yet
+        cache.clear()
+        res = self.client.get(detail_url)
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_pin_is_per_user(self):
+        flight = sample_flight()
+        replicate()
+        admin = get_user_model().objects.create_user(
+            email="admin@test.test", password="TESTPASSWORD", is_staff=True
+        )
+        self.client.force_authenticate(admin)
+        self.client.delete(reverse("airport:flights-detail", args=[flight.id]))
+
+        res = self.client.get(FLIGHT_URL)
+        self.assertEqual(res.data["results"], [])
+
+        self.client.force_authenticate(self.user)
+        res = self.client.get(FLIGHT_URL)
+        self.assertEqual(len(res.data["results"]), 1)
+
+    def test_cached_responses_are_built_from_primary(self):
+        sample_crew()
+
+        res = self.client.get(reverse("airport:crews-list"))
+
+        self.assertEqual(len(res.data["results"]), 1)
+
+    def test_reads_outside_requests_use_primary(self):
+        router = ReplicaRouter()
+
+        self.assertIsNone(router.db_for_read(Flight))
+        token = read_from_replica.set(True)
+        try:
+            self.assertEqual(router.db_for_read(Flight), REPLICA)
+        finally:
+            read_from_replica.reset(token)
+        self.assertFalse(router.allow_migrate(REPLICA, "airport"))
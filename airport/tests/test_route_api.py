@@ -1,10 +1,13 @@
+from datetime import datetime, timezone
+
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
 from rest_framework import status
 from rest_framework.reverse import reverse
 from rest_framework.test import APIClient
 
-from airport.models import Route, Airport
+from airport.models import Flight, Route, Airport
 from airport.serializers import (
     RouteListSerializer,
     RouteRetrieveSerializer,
@@ -111,6 +114,62 @@ class AuthorizedRouteApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data, serializer.data)
 
+    def route_with_flights(self, count):
+        from airport.tests.test_airplane_api import sample_airplane
+
+        route = sample_route()
+        airplane = sample_airplane()
+        Flight.objects.bulk_create(
+            Flight(
+                route=route,
+                airplane=airplane,
+                departure_time=datetime(2024, 1, day, tzinfo=timezone.utc),
+                arrival_time=datetime(2024, 1, day, 3, tzinfo=timezone.utc),
+            )
+            for day in range(1, count + 1)
+        )
+        return route
+
+    def test_retrieve_route_query_count_is_bounded(self):
+        route = self.route_with_flights(20)
+        url = reverse("airport:routes-detail", args=[route.id])
+
+        with self.assertNumQueries(3):
+            res = self.client.get(url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["flights"]), 20)
+
+    def test_retrieve_route_flights_window_and_limit(self):
+        route = self.route_with_flights(10)
+        url = reverse("airport:routes-detail", args=[route.id])
+
+        res = self.client.get(
+            url,
+            {
+                "departure_after": "2024-01-03",
+                "departure_before": "2024-01-09",
+                "flights_limit": 2,
+            },
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [flight["info"] for flight in res.data["flights"]],
+            [
+                str(flight)
+                for flight in Flight.objects.order_by("departure_time")[2:4]
+            ],
+        )
+
+    def test_retrieve_route_invalid_flights_limit(self):
+        route = sample_route()
+        url = reverse("airport:routes-detail", args=[route.id])
+
+        res = self.client.get(url, {"flights_limit": 0})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_create_route_forbidden(self):
         source = sample_airport(
             name="TestSource", closest_big_city="TestSourceCity"
@@ -128,6 +187,82 @@ class AuthorizedRouteApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
 
 
+class ShortestPathApiTests(TestCase):
+    def setUp(self):
+        # routes of earlier tests were rolled back without a new version
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.test", password="TESTPASSWORD"
+        )
+        self.client.force_authenticate(self.user)
+        self.kyiv = sample_airport(name="Kyiv")
+        self.warsaw = sample_airport(name="Warsaw")
+        self.lisbon = sample_airport(name="Lisbon")
+        self.to_warsaw = sample_route(
+            source=self.kyiv, destination=self.warsaw, distance=700
+        )
+        self.to_lisbon = sample_route(
+            source=self.warsaw, destination=self.lisbon, distance=2700
+        )
+        sample_route(source=self.kyiv, destination=self.lisbon, distance=3500)
+        self.url = reverse("airport:routes-shortest-path")
+
+    def test_shortest_path(self):
+        res = self.client.get(
+            self.url,
+            {"source": self.kyiv.id, "destination": self.lisbon.id},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["distance"], 3400)
+        self.assertEqual(
+            res.data["airports"],
+            [self.kyiv.id, self.warsaw.id, self.lisbon.id],
+        )
+        self.assertEqual(
+            res.data["routes"], [self.to_warsaw.id, self.to_lisbon.id]
+        )
+
+    def test_shortest_path_after_route_change(self):
+        self.client.get(
+            self.url,
+            {"source": self.kyiv.id, "destination": self.lisbon.id},
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            direct = sample_route(
+                source=self.kyiv, destination=self.lisbon, distance=3300
+            )
+
+        res = self.client.get(
+            self.url,
+            {"source": self.kyiv.id, "destination": self.lisbon.id},
+        )
+
+        self.assertEqual(res.data["routes"], [direct.id])
+
+    def test_shortest_path_unreachable(self):
+        res = self.client.get(
+            self.url,
+            {"source": self.lisbon.id, "destination": self.kyiv.id},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_shortest_paths_bulk(self):
+        pairs = [
+            {"source": self.kyiv.id, "destination": self.lisbon.id},
+            {"source": self.kyiv.id, "destination": self.warsaw.id},
+            {"source": self.lisbon.id, "destination": self.kyiv.id},
+        ]
+        res = self.client.post(self.url, {"pairs": pairs}, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [path["distance"] for path in res.data], [3400, 700, None]
+        )
+
+
 class AdminUserRouteApiTests(TestCase):
     def setUp(self):
         self.client = APIClient()
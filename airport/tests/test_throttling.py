@@ -0,0 +1,120 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient, APIRequestFactory
+
+from airport.throttling import (
+    LocalRateLimitBackend,
+    SlidingWindowRateThrottle,
+    rate_limit_backend,
+)
+
+FLIGHT_URL = reverse("airport:flights-list")
+TOKEN_URL = reverse("user:token_obtain_pair")
+RATES = {"anon": "2/min", "user": "4/min"}
+
+
+class LocalRateLimitBackendTests(TestCase):
+    def setUp(self):
+        self.backend = LocalRateLimitBackend()
+
+    def acquire(self, window, weight=1):
+        return self.backend.acquire("key", window, 4, weight, 120)
+
+    def test_limit_within_window(self):
+        for _ in range(4):
+            self.assertTrue(self.acquire(10)[0])
+
+        self.assertEqual(self.acquire(10), (False, 0, 4))
+
+    def test_previous_window_slides_out(self):
+        for _ in range(4):
+            self.acquire(10)
+
+        # a quarter into the next window 3 of the 4 requests still count
+        self.assertEqual(self.acquire(11, weight=0.75), (True, 4, 1))
+        self.assertFalse(self.acquire(11, weight=0.75)[0])
+        self.assertTrue(self.acquire(11, weight=0.25)[0])
+        self.assertEqual(self.acquire(13), (True, 0, 1))
+
+    def test_least_recently_used_keys_are_dropped(self):
+        backend = LocalRateLimitBackend(max_keys=2)
+        for key in ("first", "second", "third"):
+            backend.acquire(key, 1, 4, 1, 120)
+
+        self.assertEqual(list(backend.counters), ["second", "third"])
+
+
+class SlidingWindowThrottleTests(TestCase):
+    def setUp(self):
+        rate_limit_backend().clear()
+        self.factory = APIRequestFactory()
+
+    def throttle_at(self, now, user=None):
+        request = self.factory.get(FLIGHT_URL, REMOTE_ADDR="10.0.0.1")
+        request.user = user
+        throttle = SlidingWindowRateThrottle()
+        throttle.timer = lambda: now
+        return throttle, throttle.allow_request(request, None)
+
+    @override_settings(REST_FRAMEWORK={"DEFAULT_THROTTLE_RATES": RATES})
+    def test_wait(self):
+        self.throttle_at(600)
+        self.throttle_at(630)
+
+        throttle, allowed = self.throttle_at(645)
+        self.assertFalse(allowed)
+        self.assertEqual(throttle.wait(), 15)
+
+        # half of the previous window still counts
+        self.assertTrue(self.throttle_at(690)[1])
+        throttle, allowed = self.throttle_at(690)
+        self.assertFalse(allowed)
+        self.assertEqual(throttle.wait(), 0)
+        self.assertTrue(self.throttle_at(691)[1])
+
+
+@override_settings(
+    REST_FRAMEWORK={
+        **settings.REST_FRAMEWORK,
+        "DEFAULT_THROTTLE_RATES": RATES,
+    }
+)
+class ThrottledApiTests(TestCase):
+    def setUp(self):
+        rate_limit_backend().clear()
+        self.client = APIClient()
+
+    def test_anonymous_rate(self):
+        for _ in range(2):
+            res = self.client.post(TOKEN_URL, {})
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.post(TOKEN_URL, {})
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn("Retry-After", res)
+
+    def test_user_rate(self):
+        user = get_user_model().objects.create_user(
+            email="test@test.test", password="TESTPASSWORD"
+        )
+        self.client.force_authenticate(user)
+        for _ in range(4):
+            res = self.client.get(FLIGHT_URL)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = self.client.get(FLIGHT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    @override_settings(
+        THROTTLE_BACKEND={
+            "BACKEND": "airport.throttling.LocalRateLimitBackend",
+            "OPTIONS": {"max_keys": 10},
+        }
+    )
+    def test_backend_from_settings(self):
+        self.assertEqual(rate_limit_backend().max_keys, 10)
@@ -0,0 +1,64 @@
+import asyncio
+import threading
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TransactionTestCase
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from user.executors import BoundedExecutor, ExecutorFull
+
+REGISTER_URL = reverse("user:register")
+TOKEN_URL = reverse("user:token_obtain_pair")
+
+
+class BoundedExecutorTests(SimpleTestCase):
+    def test_full_executor_rejects_calls(self):
+        executor = BoundedExecutor(1, 1, "test")
+        release = threading.Event()
+
+        async def calls():
+            running = asyncio.ensure_future(executor.run(release.wait))
+            waiting = asyncio.ensure_future(executor.run(release.wait))
+            await asyncio.sleep(0)
+            with self.assertRaises(ExecutorFull):
+                await executor.run(release.wait)
+            release.set()
+            await asyncio.gather(running, waiting)
+            # the slots are free again
+            return await executor.run(lambda: "done")
+
+        self.assertEqual(asyncio.run(calls()), "done")
+
+
+# the views run in other threads, with their own database connections
+class OffloadedUserApiTests(TransactionTestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_register_and_obtain_token(self):
+        credentials = {"email": "test@test.test", "password": "TESTPASSWORD"}
+
+        res = self.client.post(REGISTER_URL, credentials)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(
+            get_user_model()
+            .objects.get(email="test@test.test")
+            .check_password("TESTPASSWORD")
+        )
+
+        res = self.client.post(TOKEN_URL, credentials)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn("access", res.data)
+
+    def test_wrong_password(self):
+        get_user_model().objects.create_user(
+            email="test@test.test", password="TESTPASSWORD"
+        )
+
+        res = self.client.post(
+            TOKEN_URL, {"email": "test@test.test", "password": "WRONG"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
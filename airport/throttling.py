@@ -0,0 +1,181 @@
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+KEY_PREFIX = "airport:throttle:"
+
+# the Redis counterpart of LocalRateLimitBackend.acquire
+ACQUIRE_SCRIPT = """
+local window = tonumber(ARGV[1])
+local state = redis.call("HMGET", KEYS[1], "window", "previous", "current")
+local stored = tonumber(state[1])
+local previous, current = 0, 0
+if stored == window then
+    previous = tonumber(state[2])
+    current = tonumber(state[3])
+elseif stored == window - 1 then
+    previous = tonumber(state[3])
+end
+if previous * tonumber(ARGV[3]) + current >= tonumber(ARGV[2]) then
+    return {0, previous, current}
+end
+current = current + 1
+redis.call(
+    "HSET", KEYS[1], "window", window, "previous", previous, "current", current
+)
+redis.call("PEXPIRE", KEYS[1], ARGV[4])
+return {1, previous, current}
+"""
+
+
+def roll(state, window) -> tuple[int, int]:
+    """Counts of the previous and current window from a stored state."""
+    if state is None:
+        return 0, 0
+    stored, previous, current = state
+    if stored == window:
+        return previous, current
+    if stored == window - 1:
+        return current, 0
+    return 0, 0
+
+
+class LocalRateLimitBackend:
+    """
+    Counters kept in this process, for tests and single-process servers.
+    The least recently used clients are forgotten past `max_keys`.
+    """
+
+    def __init__(self, max_keys=100_000):
+        self.max_keys = max_keys
+        self.counters = OrderedDict()
+        self.lock = threading.Lock()
+
+    def acquire(self, key, window, limit, weight, ttl):
+        """
+        Count a request of `key` in `window` unless the weighted count of
+        the previous window plus the current one reached `limit`.
+        Return whether it was counted and both counts.
+        """
+        with self.lock:
+            previous, current = roll(self.counters.get(key), window)
+            allowed = previous * weight + current < limit
+            if allowed:
+                current += 1
+            self.counters[key] = (window, previous, current)
+            self.counters.move_to_end(key)
+            while len(self.counters) > self.max_keys:
+                self.counters.popitem(last=False)
+        return allowed, previous, current
+
+    def clear(self):
+        with self.lock:
+            self.counters.clear()
+
+
+class RedisRateLimitBackend:
+    """
+    Counters shared by all workers, in a Redis hash per client updated
+    by a Lua script, so a request costs one round trip.
+    """
+
+    def __init__(self, url):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.script = self.client.register_script(ACQUIRE_SCRIPT)
+
+    def acquire(self, key, window, limit, weight, ttl):
+        allowed, previous, current = self.script(
+            keys=[key], args=[window, limit, weight, int(ttl * 1000)]
+        )
+        return bool(allowed), previous, current
+
+    def clear(self):
+        for keys in self.client.scan_iter(match=f"{KEY_PREFIX}*", count=1000):
+            self.client.delete(keys)
+
+
+backend = None
+
+
+def rate_limit_backend():
+    """The THROTTLE_BACKEND of this process."""
+    global backend
+    if backend is None:
+        config = settings.THROTTLE_BACKEND
+        backend = import_string(config["BACKEND"])(**config.get("OPTIONS", {}))
+    return backend
+
+
+@receiver(setting_changed)
+def reset_backend(setting, **kwargs):
+    global backend
+    if setting == "THROTTLE_BACKEND":
+        backend = None
+
+
+class SlidingWindowRateThrottle(SimpleRateThrottle):
+    """
+    Limit requests to the `user` rate per user, or the `anon` rate per
+    client address, over a sliding window.
+
+    The window is estimated from two fixed-window counters: the current
+    one, plus the previous one weighted by how much of it the sliding
+    window still covers. That is a constant amount of memory per client
+    and one call of the rate limit backend per request.
+    """
+
+    cache_format = KEY_PREFIX + "%(scope)s:%(ident)s"
+
+    def __init__(self):
+        # the scope, and with it the rate, depends on the request
+        pass
+
+    def get_rate(self):
+        # looked up per request, like the scope
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {"scope": self.scope, "ident": ident}
+
+    def allow_request(self, request, view):
+        authenticated = bool(request.user and request.user.is_authenticated)
+        self.scope = "user" if authenticated else "anon"
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        if self.rate is None:
+            return True
+
+        window, self.elapsed = divmod(self.timer(), self.duration)
+        allowed, self.previous, self.current = rate_limit_backend().acquire(
+            self.get_cache_key(request, view),
+            int(window),
+            self.num_requests,
+            1 - self.elapsed / self.duration,
+            2 * self.duration,
+        )
+        return allowed
+
+    def wait(self):
+        """Seconds until the weighted count drops below the limit."""
+        remaining = self.duration - self.elapsed
+        if self.current >= self.num_requests:
+            # this window becomes the previous one, which has to slide
+            # out far enough
+            return remaining + self.duration * (
+                1 - self.num_requests / self.current
+            )
+        # previous * (1 - elapsed / duration) + current < num_requests
+        needed = 1 - (self.num_requests - self.current) / self.previous
+        return max(0.0, needed * self.duration - self.elapsed)
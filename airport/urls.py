@@ -14,6 +14,13 @@ router.register(r"routes", views.RouteViewSet, basename="routes")
 router.register(r"airplanes", views.AirplaneViewSet, basename="airplanes")
 router.register(r"flights", views.FlightViewSet, basename="flights")
 
-urlpatterns = [path("", include(router.urls))]
+urlpatterns = [
+    path(
+        "database-pools/",
+        views.DatabasePoolView.as_view(),
+        name="database-pools",
+    ),
+    path("", include(router.urls)),
+]
 
 app_name = "airport"
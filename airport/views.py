@@ -1,11 +1,38 @@
+import base64
+import json
+from datetime import date, datetime, time, timedelta
+from itertools import chain
+
+from django.core.exceptions import FieldDoesNotExist
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Count, Prefetch, Q, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.dateparse import parse_date, parse_datetime
 from drf_spectacular.utils import extend_schema
 from rest_framework import viewsets, status, mixins
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.views import APIView
 from rest_framework.viewsets import GenericViewSet
 
+from airport.cache import (
+    CachedResponseMixin,
+    ConditionalGetMixin,
+    bump_model_version,
+)
+from airport.exports import (
+    FLIGHT_COLUMNS,
+    ORDER_COLUMNS,
+    TICKET_COLUMNS,
+    export_response,
+)
+from airport.itineraries import flight_index
 from airport.models import (
     AirplaneType,
     Order,
@@ -14,12 +41,29 @@ from airport.models import (
     Route,
     Airport,
     Crew,
+    Ticket,
+    SeatHold,
 )
 from airport.parameters import (
     airplane_type_parameters,
+    connection_parameters,
+    flight_export_parameters,
     flight_parameters,
+    order_export_parameters,
+    route_flights_parameters,
     route_parameters,
+    seat_map_parameters,
+    shortest_path_parameters,
 )
+from airport.pools import database_pool_metrics
+from airport.prefetch import PlannedQuerysetMixin
+from airport.replicas import ReplicaReadMixin
+from airport.schedules import (
+    ScheduleCSVParser,
+    ScheduleImport,
+    ScheduleNDJSONParser,
+)
+from airport.seats import encode_bitmap, expand_bitmap, occupancy_bitmap
 from airport.serializers import (
     AirplaneTypeSerializer,
     OrderListSerializer,
@@ -38,19 +82,189 @@ from airport.serializers import (
     RouteSerializer,
     AirplaneListSerializer,
     FlightListSerializer,
+    SeatHoldSerializer,
+    ConnectionSearchSerializer,
+    ConnectionSerializer,
+    AirportPairSerializer,
+    AirportPairsSerializer,
+    ShortestPathSerializer,
+    FlightScheduleRowSerializer,
+    FlightScheduleReportSerializer,
+    DatabasePoolSerializer,
 )
+from airport.routing import route_graph
+
+
+SEAT_MAP_MAX_AGE = 5
+ROUTE_FLIGHTS_LIMIT = 50
+ROUTE_FLIGHTS_MAX_LIMIT = 500
+
+
+def model_field(model, path: str):
+    """The model field a lookup path such as `route__source__name` ends at."""
+    for name in path.split("__"):
+        field = model._meta.get_field(name)
+        model = field.related_model
+    return field
 
 
 # Create your views here.
 class ViewsSetPagination(PageNumberPagination):
+    """
+    Page number pagination, or keyset pagination when the `cursor`
+    parameter is given (empty for the first page). Keyset pages follow
+    the ordering of the queryset with the id as a tiebreaker in the
+    same direction, only link to the next page and don't count objects.
+    """
+
     page_size = 5
     page_size_query_param = "page_size"
     max_page_size = 10
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.cursor_query_param in request.query_params
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        ordering = [
+            (field.lstrip("-"), field.startswith("-"))
+            for field in queryset.query.order_by
+            if field.lstrip("-") not in ("id", "pk")
+        ]
+        ordering.append(("id", ordering[0][1] if ordering else False))
+        queryset = queryset.order_by(
+            *(f"-{field}" if desc else field for field, desc in ordering)
+        )
 
+        position = self.decode_cursor(request)
+        if position is not None:
+            position = self.cursor_values(queryset.model, ordering, position)
+            queryset = queryset.filter(self.after(ordering, position))
+
+        page_size = self.get_page_size(request)
+        page = list(queryset[: page_size + 1])
+        self.next_position = None
+        if len(page) > page_size:
+            page = page[:page_size]
+            self.next_position = [
+                self.field_value(page[-1], field) for field, _ in ordering
+            ]
+        return page
+
+    @staticmethod
+    def after(ordering, position):
+        """Rows placed after `position` in the given ordering."""
+        condition = Q()
+        for index, (field, desc) in enumerate(ordering):
+            ties = {
+                previous: value
+                for (previous, _), value in zip(ordering[:index], position)
+            }
+            lookup = f"{field}__lt" if desc else f"{field}__gt"
+            condition |= Q(**ties, **{lookup: position[index]})
+        return condition
+
+    def cursor_values(self, model, ordering, position):
+        """
+        The values of a cursor converted to the types of the ordering
+        fields. Tampered cursors are not found.
+        """
+        if len(position) != len(ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        values = []
+        for (path, _), value in zip(ordering, position):
+            if value is None or isinstance(value, (list, dict)):
+                raise NotFound(self.invalid_cursor_message)
+            try:
+                field = model_field(model, path)
+            except FieldDoesNotExist:
+                # annotations are compared as they are
+                values.append(value)
+                continue
+            try:
+                values.append(field.to_python(value))
+            except (DjangoValidationError, TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+        return values
+
+    @staticmethod
+    def field_value(obj, field):
+        for attr in field.split("__"):
+            obj = getattr(obj, attr)
+        if isinstance(obj, (datetime, date)):
+            return obj.isoformat()
+        return obj
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            position = json.loads(base64.urlsafe_b64decode(encoded))
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if not isinstance(position, list):
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+
+        if self.next_position is None:
+            return None
+
+        cursor = base64.urlsafe_b64encode(
+            json.dumps(self.next_position).encode()
+        ).decode()
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param, cursor
+        )
 
-class OrderViewSet(viewsets.ModelViewSet):
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(view) + [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Keyset pagination cursor, "
+                "empty for the first page.",
+                "schema": {"type": "string"},
+            }
+        ]
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+
+        return Response({"next": self.get_next_link(), "results": data})
+
+
+class OrderViewSet(
+    ReplicaReadMixin,
+    ConditionalGetMixin,
+    PlannedQuerysetMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Order.objects.all().order_by("-created_at")
     pagination_class = ViewsSetPagination
+    cache_models = (
+        Order,
+        Ticket,
+        Flight,
+        Route,
+        Airport,
+        Airplane,
+        AirplaneType,
+        Crew,
+        Flight.crew.through,
+    )
     permission_classes = (IsAuthenticated,)
 
     def get_serializer_class(self):
@@ -63,15 +277,11 @@ class OrderViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
 
         if self.request.user.id:
-            if self.action == "list":
+            if self.action in ("list", "retrieve"):
+                # flights shared by many tickets are loaded once
                 return self.queryset.filter(
                     user=self.request.user
-                ).prefetch_related("tickets")
-
-            if self.action == "retrieve":
-                return self.queryset.filter(
-                    user=self.request.user
-                ).prefetch_related("tickets__flight__route")
+                ).prefetch_related("tickets__flight")
 
             return self.queryset
         return Response(status=status.HTTP_401_UNAUTHORIZED)
@@ -106,8 +316,70 @@ class OrderViewSet(viewsets.ModelViewSet):
         """Delete order with provided id."""
         return super().destroy(request, *args, **kwargs)
 
+    def created_between(self, queryset, created_at):
+        created_after = self.request.GET.get("created_after")
+        created_before = self.request.GET.get("created_before")
+
+        if created_after:
+            queryset = queryset.filter(
+                **{
+                    f"{created_at}__gte": str_to_datetime(
+                        created_after, "created_after"
+                    )
+                }
+            )
+
+        if created_before:
+            queryset = queryset.filter(
+                **{
+                    f"{created_at}__lt": str_to_datetime(
+                        created_before, "created_before"
+                    )
+                }
+            )
+
+        return queryset
+
+    @extend_schema(parameters=order_export_parameters, responses=str)
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="export",
+        permission_classes=(IsAdminUser,),
+    )
+    def export(self, request, *args, **kwargs):
+        """Stream orders of all users as CSV or NDJSON."""
+        orders = self.created_between(
+            Order.objects.order_by("id").annotate(
+                ticket_count=Count("tickets")
+            ),
+            "created_at",
+        )
+        return export_response(request, orders, ORDER_COLUMNS, "orders")
+
+    @extend_schema(parameters=order_export_parameters, responses=str)
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="tickets/export",
+        permission_classes=(IsAdminUser,),
+    )
+    def export_tickets(self, request, *args, **kwargs):
+        """
+        Stream tickets of all users as CSV or NDJSON, filtered by the
+        creation time of their orders.
+        """
+        tickets = self.created_between(
+            Ticket.objects.order_by("id"), "order__created_at"
+        )
+        return export_response(request, tickets, TICKET_COLUMNS, "tickets")
+
 
 class AirplaneTypeViewSet(
+    ReplicaReadMixin,
+    CachedResponseMixin,
+    ConditionalGetMixin,
+    PlannedQuerysetMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
     mixins.UpdateModelMixin,
@@ -116,6 +388,7 @@ class AirplaneTypeViewSet(
 ):
     queryset = AirplaneType.objects.all().order_by("name")
     pagination_class = ViewsSetPagination
+    cache_models = (AirplaneType, Airplane)
 
     @extend_schema(responses=AirplaneTypeSerializer)
     def list(self, request, *args, **kwargs):
@@ -149,9 +422,24 @@ class AirplaneTypeViewSet(
         return AirplaneTypeSerializer
 
 
-class CrewViewSet(viewsets.ModelViewSet):
+class CrewViewSet(
+    ReplicaReadMixin,
+    CachedResponseMixin,
+    ConditionalGetMixin,
+    PlannedQuerysetMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Crew.objects.all().order_by("first_name")
     pagination_class = ViewsSetPagination
+    cache_models = (
+        Crew,
+        Flight.crew.through,
+        Flight,
+        Route,
+        Airport,
+        Airplane,
+        AirplaneType,
+    )
 
     def get_serializer_class(self):
 
@@ -160,17 +448,6 @@ class CrewViewSet(viewsets.ModelViewSet):
 
         return CrewListSerializer
 
-    def get_queryset(self):
-
-        if self.action == "retrieve":
-            return self.queryset.prefetch_related(
-                "flights__airplane__airplane_type",
-                "flights__route__destination",
-                "flights__route__source",
-            )
-
-        return self.queryset
-
     @extend_schema()
     def list(self, request, *args, **kwargs):
         """Get all crews."""
@@ -202,10 +479,17 @@ class CrewViewSet(viewsets.ModelViewSet):
         return super().destroy(request, *args, **kwargs)
 
 
-class AirportViewSet(viewsets.ModelViewSet):
+class AirportViewSet(
+    ReplicaReadMixin,
+    CachedResponseMixin,
+    ConditionalGetMixin,
+    PlannedQuerysetMixin,
+    viewsets.ModelViewSet,
+):
     serializer_class = AirportSerializer
     queryset = Airport.objects.all().order_by("name")
     pagination_class = ViewsSetPagination
+    cache_models = (Airport,)
 
     @extend_schema(responses=AirportSerializer)
     def list(self, request, *args, **kwargs):
@@ -242,25 +526,46 @@ def str_to_int(id_string):
     return [int(num) for num in id_string.split(",")]
 
 
-class RouteViewSet(viewsets.ModelViewSet):
-    queryset = (
-        Route.objects.all()
-        .select_related(
-            "source",
-            "destination",
-        )
-        .order_by("source__name")
-    )
+def str_to_datetime(date_string, param):
+    try:
+        moment = parse_datetime(date_string)
+        if moment is None and (day := parse_date(date_string)):
+            moment = datetime.combine(day, time.min)
+    except ValueError:
+        moment = None
+
+    if moment is None:
+        raise ValidationError({param: "Expected an ISO 8601 date or time."})
+
+    if timezone.is_naive(moment):
+        return timezone.make_aware(moment)
+    return moment
+
+
+class RouteViewSet(
+    ReplicaReadMixin,
+    ConditionalGetMixin,
+    PlannedQuerysetMixin,
+    viewsets.ModelViewSet,
+):
+    queryset = Route.objects.all().order_by("source__name")
     pagination_class = ViewsSetPagination
+    cache_models = (Route, Airport, Flight)
 
     @extend_schema(responses=RouteListSerializer, parameters=route_parameters)
     def list(self, request, *args, **kwargs):
         """Get all routes. Filtering by source, destination."""
         return super().list(request, *args, **kwargs)
 
-    @extend_schema(responses=RouteRetrieveSerializer)
+    @extend_schema(
+        responses=RouteRetrieveSerializer,
+        parameters=route_flights_parameters,
+    )
     def retrieve(self, request, *args, **kwargs):
-        """Get route by id."""
+        """
+        Get route by id with its flights ordered by departure.
+        Filtering flights by departure window, limiting their number.
+        """
         return super().retrieve(request, *args, **kwargs)
 
     @extend_schema(methods=["POST"], responses=RouteSerializer)
@@ -283,6 +588,60 @@ class RouteViewSet(viewsets.ModelViewSet):
         """Delete route with provided id."""
         return super().destroy(request, *args, **kwargs)
 
+    @extend_schema(
+        methods=["GET"],
+        parameters=shortest_path_parameters,
+        responses=ShortestPathSerializer,
+    )
+    @extend_schema(
+        methods=["POST"],
+        request=AirportPairsSerializer,
+        responses=ShortestPathSerializer(many=True),
+    )
+    @action(
+        methods=["GET", "POST"],
+        detail=False,
+        url_path="shortest-path",
+        permission_classes=(IsAuthenticated,),
+    )
+    def shortest_path(self, request, *args, **kwargs):
+        """
+        Get the path of routes with the minimum total distance between
+        two airports. POST takes many source/destination pairs at once,
+        unreachable pairs get a null distance.
+        """
+        if request.method == "POST":
+            serializer = AirportPairsSerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            paths = route_graph.shortest_paths(
+                (pair["source"], pair["destination"])
+                for pair in serializer.validated_data["pairs"]
+            )
+            return Response(
+                ShortestPathSerializer(paths, many=True).data,
+                status=status.HTTP_200_OK,
+            )
+
+        serializer = AirportPairSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        (path,) = route_graph.shortest_paths(
+            [
+                (
+                    serializer.validated_data["source"],
+                    serializer.validated_data["destination"],
+                )
+            ]
+        )
+
+        if path.distance is None:
+            return Response(
+                {"detail": "No routes connect these airports."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        return Response(
+            ShortestPathSerializer(path).data, status=status.HTTP_200_OK
+        )
+
     def get_serializer_class(self):
 
         if self.action == "retrieve":
@@ -307,15 +666,72 @@ class RouteViewSet(viewsets.ModelViewSet):
                 destination_id__in=str_to_int(destination)
             )
 
-        if self.action == "list":
-            return self.queryset.prefetch_related("destination", "source")
+        if self.action == "retrieve":
+            return self.queryset.prefetch_related(self.route_flights())
 
         return self.queryset
 
+    def route_flights(self):
+        """
+        Prefetch of the flights shown on route detail, ordered by
+        departure and limited to the requested window.
+        """
+        departure_after = self.request.GET.get("departure_after")
+        departure_before = self.request.GET.get("departure_before")
+        limit = self.request.GET.get("flights_limit")
+
+        flights = Flight.objects.order_by("departure_time", "id")
+        if departure_after:
+            flights = flights.filter(
+                departure_time__gte=str_to_datetime(
+                    departure_after, "departure_after"
+                )
+            )
+        if departure_before:
+            flights = flights.filter(
+                departure_time__lt=str_to_datetime(
+                    departure_before, "departure_before"
+                )
+            )
+
+        if limit is None:
+            limit = ROUTE_FLIGHTS_LIMIT
+        else:
+            try:
+                limit = int(limit)
+            except ValueError:
+                limit = 0
+            if not 0 < limit <= ROUTE_FLIGHTS_MAX_LIMIT:
+                raise ValidationError(
+                    {
+                        "flights_limit": "Expected a number from 1 to "
+                        f"{ROUTE_FLIGHTS_MAX_LIMIT}."
+                    }
+                )
+
+        # Django cannot re-filter a sliced prefetch of a single route, so
+        # the limit is a window filter, the same one slicing compiles to.
+        return Prefetch(
+            "flights",
+            queryset=flights.annotate(
+                position=Window(
+                    RowNumber(),
+                    partition_by="route",
+                    order_by=("departure_time", "id"),
+                )
+            ).filter(position__lte=limit),
+        )
+
 
-class AirplaneViewSet(viewsets.ModelViewSet):
+class AirplaneViewSet(
+    ReplicaReadMixin,
+    ConditionalGetMixin,
+    PlannedQuerysetMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Airplane.objects.all().order_by("-name")
     pagination_class = ViewsSetPagination
+    cache_models = (Airplane, AirplaneType, Flight, Route, Airport)
 
     @extend_schema(
         responses=AirplaneSerializer, parameters=airplane_type_parameters
@@ -370,14 +786,6 @@ class AirplaneViewSet(viewsets.ModelViewSet):
                 airplane_type_id__in=str_to_int(airplane_type)
             )
 
-        if self.action == "list":
-            return self.queryset.prefetch_related("airplane_type")
-
-        if self.action == "retrieve":
-            return self.queryset.prefetch_related(
-                "flights__route__destination", "flights__route__source"
-            ).select_related("airplane_type")
-
         return self.queryset
 
     @action(
@@ -397,17 +805,30 @@ class AirplaneViewSet(viewsets.ModelViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class FlightViewSet(viewsets.ModelViewSet):
-    queryset = (
-        Flight.objects.all()
-        .select_related("route__destination", "route__source", "airplane")
-        .order_by("departure_time")
-    )
+class FlightViewSet(
+    ReplicaReadMixin,
+    ConditionalGetMixin,
+    PlannedQuerysetMixin,
+    viewsets.ModelViewSet,
+):
+    queryset = Flight.objects.all().order_by("departure_time")
     pagination_class = ViewsSetPagination
+    cache_models = (
+        Flight,
+        Route,
+        Airport,
+        Airplane,
+        AirplaneType,
+        Crew,
+        Flight.crew.through,
+    )
 
     @extend_schema(responses=FlightSerializer, parameters=flight_parameters)
     def list(self, request, *args, **kwargs):
-        """Get all flights. Filtering by airplane, route, crew"""
+        """
+        Get all flights. Filtering by airplane, route, crew,
+        source and destination airports, departure time
+        """
         return super().list(request, *args, **kwargs)
 
     @extend_schema(responses=FlightRetrieveSerializer)
@@ -448,6 +869,10 @@ class FlightViewSet(viewsets.ModelViewSet):
         route = self.request.GET.get("route")
         airplane = self.request.GET.get("airplane")
         crew = self.request.GET.get("crew")
+        source = self.request.GET.get("source")
+        destination = self.request.GET.get("destination")
+        departure_after = self.request.GET.get("departure_after")
+        departure_before = self.request.GET.get("departure_before")
 
         if route:
             self.queryset = self.queryset.filter(
@@ -462,7 +887,194 @@ class FlightViewSet(viewsets.ModelViewSet):
         if crew:
             self.queryset = self.queryset.filter(crew__in=str_to_int(crew))
 
-        if self.action == "list":
+        if source:
+            self.queryset = self.queryset.filter(
+                route__source_id__in=str_to_int(source)
+            )
+
+        if destination:
+            self.queryset = self.queryset.filter(
+                route__destination_id__in=str_to_int(destination)
+            )
+
+        if departure_after:
+            self.queryset = self.queryset.filter(
+                departure_time__gte=str_to_datetime(
+                    departure_after, "departure_after"
+                )
+            )
+
+        if departure_before:
+            self.queryset = self.queryset.filter(
+                departure_time__lt=str_to_datetime(
+                    departure_before, "departure_before"
+                )
+            )
+
+        if self.action in self.planned_actions:
             return self.queryset
 
-        return self.queryset.select_related("airplane__airplane_type")
+        return self.queryset.select_related("airplane")
+
+    @extend_schema(parameters=seat_map_parameters)
+    @action(methods=["GET"], detail=True, url_path="seat-map")
+    def seat_map(self, request, *args, **kwargs):
+        """
+        Get seat occupancy of a flight as a row-major base64 bitset,
+        where a set bit marks a sold or held seat.
+        """
+        flight = self.get_object()
+        rows = flight.airplane.rows
+        seats_in_row = flight.airplane.seats_in_row
+        occupied = chain(
+            Ticket.objects.filter(flight_id=flight.id).values_list(
+                "row", "seat"
+            ),
+            SeatHold.objects.filter(
+                flight_id=flight.id, expires_at__gt=timezone.now()
+            ).values_list("row", "seat"),
+        )
+        bitmap = occupancy_bitmap(rows, seats_in_row, occupied)
+        data = {
+            "flight": flight.id,
+            "rows": rows,
+            "seats_in_row": seats_in_row,
+            "available_places": rows * seats_in_row
+            - sum(bin(byte).count("1") for byte in bitmap),
+        }
+
+        if request.GET.get("expand") in ("true", "1"):
+            data["seats"] = expand_bitmap(bitmap, rows, seats_in_row)
+        else:
+            data["encoding"] = "base64"
+            data["bitmap"] = encode_bitmap(bitmap)
+
+        response = Response(data, status=status.HTTP_200_OK)
+        patch_cache_control(response, private=True, max_age=SEAT_MAP_MAX_AGE)
+        return response
+
+    @extend_schema(
+        methods=["POST"],
+        request=SeatHoldSerializer,
+        responses=SeatHoldSerializer,
+    )
+    @extend_schema(methods=["DELETE"], request=None, responses=None)
+    @action(
+        methods=["POST", "DELETE"],
+        detail=True,
+        url_path="hold",
+        permission_classes=(IsAuthenticated,),
+    )
+    def hold(self, request, *args, **kwargs):
+        """
+        Hold seats of a flight for the current user until the hold
+        expires, replacing the user's previous hold on this flight.
+        Held seats are booked by creating an order for them.
+        DELETE releases the hold.
+        """
+        flight = self.get_object()
+
+        if request.method == "DELETE":
+            flight.seat_holds.filter(user=request.user).delete()
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
+        serializer = SeatHoldSerializer(
+            data=request.data,
+            context={**self.get_serializer_context(), "flight": flight},
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @extend_schema(parameters=flight_export_parameters, responses=str)
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="export",
+        permission_classes=(IsAdminUser,),
+    )
+    def export(self, request, *args, **kwargs):
+        """
+        Stream flights as CSV or NDJSON, with the filters of the flight
+        list.
+        """
+        flights = self.get_queryset().order_by("id")
+        return export_response(request, flights, FLIGHT_COLUMNS, "flights")
+
+    @extend_schema(
+        methods=["POST"],
+        request={
+            ScheduleCSVParser.media_type: FlightScheduleRowSerializer,
+            ScheduleNDJSONParser.media_type: FlightScheduleRowSerializer,
+        },
+        responses=FlightScheduleReportSerializer,
+    )
+    @action(
+        methods=["POST"],
+        detail=False,
+        url_path="import",
+        permission_classes=(IsAdminUser,),
+        parser_classes=(ScheduleCSVParser, ScheduleNDJSONParser),
+    )
+    def import_schedule(self, request, *args, **kwargs):
+        """
+        Create flights from a CSV (crew ids separated by spaces) or
+        NDJSON schedule with route, airplane, departure_time,
+        arrival_time and crew. Valid rows are created, invalid ones
+        are reported by line.
+        """
+        schedule = ScheduleImport().run(request.data)
+        if schedule.created:
+            # bulk inserts send no signals
+            bump_model_version(Flight)
+            bump_model_version(Flight.crew.through)
+            flight_index.invalidate()
+
+        return Response(
+            FlightScheduleReportSerializer(schedule).data,
+            status=status.HTTP_200_OK,
+        )
+
+    @extend_schema(
+        parameters=connection_parameters,
+        responses=ConnectionSerializer(many=True),
+    )
+    @action(methods=["GET"], detail=False, url_path="connections")
+    def connections(self, request, *args, **kwargs):
+        """
+        Search itineraries between two airports, direct or with
+        connections. Layovers are given in minutes.
+        """
+        serializer = ConnectionSearchSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        search = serializer.validated_data
+
+        itineraries = flight_index.search(
+            search["source"],
+            search["destination"],
+            search["departure_after"],
+            search["departure_before"],
+            max_connections=search["max_connections"],
+            min_layover=timedelta(minutes=search["min_layover"]),
+            max_layover=timedelta(minutes=search["max_layover"]),
+            limit=search["limit"],
+        )
+        return Response(
+            ConnectionSerializer(itineraries, many=True).data,
+            status=status.HTTP_200_OK,
+        )
+
+
+class DatabasePoolView(APIView):
+    permission_classes = (IsAdminUser,)
+
+    @extend_schema(responses=DatabasePoolSerializer(many=True))
+    def get(self, request, *args, **kwargs):
+        """
+        Connection pools of this process: size, saturation and the time
+        requests waited for a connection.
+        """
+        return Response(
+            DatabasePoolSerializer(database_pool_metrics(), many=True).data,
+            status=status.HTTP_200_OK,
+        )
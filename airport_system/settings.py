@@ -108,6 +108,75 @@ DATABASES = {
     }
 }
 
+# Connections come from a psycopg pool per process, sized for the
+# threads of a worker. Without the pool they are kept open between
+# requests for POSTGRES_CONN_MAX_AGE seconds instead.
+if os.getenv("POSTGRES_POOL", "true").lower() in ("1", "true", "yes"):
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": int(os.getenv("POSTGRES_POOL_MIN_SIZE", "2")),
+            "max_size": int(os.getenv("POSTGRES_POOL_MAX_SIZE", "10")),
+            "timeout": float(os.getenv("POSTGRES_POOL_TIMEOUT", "10")),
+        }
+    }
+else:
+    DATABASES["default"]["CONN_MAX_AGE"] = int(
+        os.getenv("POSTGRES_CONN_MAX_AGE", "60")
+    )
+    DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+
+# Read replicas share the credentials of the primary. Safe requests of
+# the airport API read from them, except for a user's requests in the
+# REPLICA_PIN_SECONDS after their own write.
+DATABASE_REPLICAS = []
+for number, host in enumerate(
+    filter(None, os.getenv("POSTGRES_REPLICA_HOSTS", "").split(","))
+):
+    DATABASES[f"replica_{number}"] = {
+        **DATABASES["default"],
+        "HOST": host.strip(),
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(f"replica_{number}")
+
+DATABASE_ROUTERS = ["airport.replicas.ReplicaRouter"]
+REPLICA_PIN_SECONDS = int(os.getenv("REPLICA_PIN_SECONDS", "5"))
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+# The local memory cache stands in for a shared cache, which is used
+# when REDIS_URL is set.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+if os.getenv("REDIS_URL"):
+    CACHES["default"] = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.getenv("REDIS_URL"),
+    }
+
+# Counters of the API rate limits. The Redis backend shares them between
+# workers, the local one keeps them per process.
+THROTTLE_BACKEND = {
+    "BACKEND": "airport.throttling.LocalRateLimitBackend",
+    "OPTIONS": {"max_keys": 100_000},
+}
+
+if os.getenv("REDIS_URL"):
+    THROTTLE_BACKEND = {
+        "BACKEND": "airport.throttling.RedisRateLimitBackend",
+        "OPTIONS": {"url": os.getenv("REDIS_URL")},
+    }
+
+RESPONSE_CACHE_ALIAS = "default"
+RESPONSE_CACHE_TIMEOUT = 60 * 10
+RESPONSE_CACHE_LOCAL_SIZE = 1000
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -157,15 +226,14 @@ AUTH_USER_MODEL = "user.User"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "user.authentication.CachedJWTAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "airport.permissions.IsAdminOrIsAuthenticatedOrReadOnly",
     ],
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
+        "airport.throttling.SlidingWindowRateThrottle",
     ],
     "DEFAULT_THROTTLE_RATES": {"anon": "100/day", "user": "1000/day"},
 }
@@ -174,8 +242,36 @@ SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=60),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=3),
     "ROTATE_REFRESH_TOKENS": False,
+    "TOKEN_OBTAIN_SERIALIZER": (
+        "user.serializers.UserTokenObtainPairSerializer"
+    ),
 }
 
+# Authenticated users are read from a cache of their flags shared by the
+# workers, for at most AUTH_USER_CACHE_SECONDS. Saving a user makes every
+# worker read it from the database for as long. With JWT_TRUST_CLAIMS the
+# flags are taken from the tokens instead, so a deactivated user keeps
+# access until the refresh token expires.
+AUTH_USER_CACHE_SECONDS = int(os.getenv("AUTH_USER_CACHE_SECONDS", "60"))
+JWT_TRUST_CLAIMS = os.getenv("JWT_TRUST_CLAIMS", "false").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+
+# Threads hashing passwords for the register and token endpoints, and
+# how many more requests may wait for them before the endpoints answer
+# 503. Under ASGI waiting requests hold no worker. Tests that keep their
+# data in one transaction turn OFFLOAD_VIEWS off to run the endpoints on
+# the request thread.
+OFFLOAD_VIEWS = True
+PASSWORD_HASHING_WORKERS = int(
+    os.getenv("PASSWORD_HASHING_WORKERS", os.cpu_count() or 1)
+)
+PASSWORD_HASHING_QUEUE = int(os.getenv("PASSWORD_HASHING_QUEUE", "32"))
+
+SEAT_HOLD_TTL = timedelta(minutes=10)
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "Airport API",
     "DESCRIPTION": "Documentation for Airport API",
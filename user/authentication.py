@@ -0,0 +1,127 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (
+    AuthenticationFailed,
+    InvalidToken,
+)
+from rest_framework_simplejwt.settings import api_settings
+
+from airport.cache import shared_cache
+
+# the flags kept per user, also added to the tokens as claims
+FLAG_FIELDS = ("is_active", "is_staff", "is_superuser")
+
+
+class UserFlagCache:
+    """
+    Flags of recently authenticated users by id, kept in the shared cache
+    for at most `timeout` seconds. A changed user is marked for as long,
+    and is read from the database until the mark expires, so flags read
+    before the change cannot be cached again by any process.
+    """
+
+    changed = "changed"
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+
+    @staticmethod
+    def key(user_id) -> str:
+        return f"user:flags:{user_id}"
+
+    def get(self, user_id):
+        flags = shared_cache().get(self.key(user_id))
+        return None if flags in (None, self.changed) else tuple(flags)
+
+    def set(self, user_id, flags):
+        # does not replace the mark of a changed user
+        shared_cache().add(self.key(user_id), flags, self.timeout)
+
+    def forget(self, user_id):
+        shared_cache().set(self.key(user_id), self.changed, self.timeout)
+
+
+user_cache = UserFlagCache(settings.AUTH_USER_CACHE_SECONDS)
+
+
+def user_from_flags(user_id, flags):
+    """
+    A user with only the id and flags loaded, as if read with
+    `.only()`. Other fields are loaded on first access.
+    """
+    model = get_user_model()
+    loaded = dict(zip(FLAG_FIELDS, flags), id=user_id)
+    # from_db takes the values in the order of the model fields
+    field_names = [
+        field.attname
+        for field in model._meta.concrete_fields
+        if field.attname in loaded
+    ]
+    return model.from_db(
+        DEFAULT_DB_ALIAS,
+        field_names,
+        [loaded[name] for name in field_names],
+    )
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication reading the flags of the user from `user_cache`
+    instead of loading the user on every request.
+
+    With JWT_TRUST_CLAIMS the flags come from the claims of the token,
+    so no request reads the database, and changes of a user apply to
+    the tokens obtained after them.
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # needs the password hash
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            )
+
+        if settings.JWT_TRUST_CLAIMS and all(
+            field in validated_token for field in FLAG_FIELDS
+        ):
+            flags = tuple(validated_token[field] for field in FLAG_FIELDS)
+        else:
+            flags = self.get_flags(user_id)
+
+        user = user_from_flags(user_id, flags)
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(
+                _("User is inactive"), code="user_inactive"
+            )
+        return user
+
+    def get_flags(self, user_id) -> tuple:
+        flags = user_cache.get(user_id)
+        if flags is None:
+            try:
+                flags = (
+                    self.user_model.objects.using(DEFAULT_DB_ALIAS)
+                    .values_list(*FLAG_FIELDS)
+                    .get(**{api_settings.USER_ID_FIELD: user_id})
+                )
+            except self.user_model.DoesNotExist:
+                raise AuthenticationFailed(
+                    _("User not found"), code="user_not_found"
+                )
+            user_cache.set(user_id, flags)
+        return flags
+
+
+class CachedJWTScheme(SimpleJWTScheme):
+    """The bearer scheme of simplejwt, for the schema of the API."""
+
+    target_class = CachedJWTAuthentication
@@ -0,0 +1,83 @@
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import JsonResponse
+
+
+class ExecutorFull(Exception):
+    pass
+
+
+class BoundedExecutor:
+    """
+    Thread pool running at most `max_workers` calls at once, with at
+    most `max_queue` more waiting for a thread. Further calls are
+    rejected instead of queued.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, name: str):
+        self.executor = ThreadPoolExecutor(
+            max_workers, thread_name_prefix=name
+        )
+        self.slots = threading.BoundedSemaphore(max_workers + max_queue)
+
+    async def run(self, func, *args):
+        if not self.slots.acquire(blocking=False):
+            raise ExecutorFull
+        context = contextvars.copy_context()
+        try:
+            future = self.executor.submit(context.run, func, *args)
+        except BaseException:
+            self.slots.release()
+            raise
+        # a slot is taken until the call ends, even if the caller is gone
+        future.add_done_callback(lambda _: self.slots.release())
+        return await asyncio.wrap_future(future)
+
+
+hashing_executor = BoundedExecutor(
+    settings.PASSWORD_HASHING_WORKERS,
+    settings.PASSWORD_HASHING_QUEUE,
+    "password-hashing",
+)
+
+
+def run_view(view, request, *args, **kwargs):
+    # what request_started and request_finished do for the request
+    # thread
+    close_old_connections()
+    try:
+        return view(request, *args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+def offload(view, executor: BoundedExecutor):
+    """
+    Async version of `view` running it in `executor`, answering 503
+    right away while the executor is full. Without OFFLOAD_VIEWS it runs
+    on the request thread, with the connection of the request.
+    """
+
+    @functools.wraps(view)
+    async def offloaded_view(request, *args, **kwargs):
+        if not settings.OFFLOAD_VIEWS:
+            return await sync_to_async(view)(request, *args, **kwargs)
+        try:
+            return await executor.run(
+                functools.partial(run_view, view, request, *args, **kwargs)
+            )
+        except ExecutorFull:
+            return JsonResponse(
+                {"detail": "Too many requests in progress, try again."},
+                status=503,
+                headers={"Retry-After": "1"},
+            )
+
+    return offloaded_view
@@ -1,5 +1,8 @@
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+
+from user.authentication import FLAG_FIELDS
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -30,3 +33,16 @@ class UserSerializer(serializers.ModelSerializer):
             user.save()
 
         return user
+
+
+class UserTokenObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        """
+        Tokens carrying the flags of the user, read by
+        CachedJWTAuthentication with JWT_TRUST_CLAIMS.
+        """
+        token = super().get_token(user)
+        for field in FLAG_FIELDS:
+            token[field] = getattr(user, field)
+        return token
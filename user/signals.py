@@ -0,0 +1,18 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from user.authentication import user_cache
+from user.models import User
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_user(sender, instance, using, created=False, **kwargs):
+    if created:
+        return
+    user_cache.forget(instance.pk)
+    # again once the change is visible, for a transaction outliving the mark
+    transaction.on_commit(partial(user_cache.forget, instance.pk), using=using)
@@ -1,5 +1,9 @@
+from django.contrib.auth import get_user_model
 from rest_framework import generics
 from rest_framework.permissions import IsAuthenticated
+from rest_framework_simplejwt.views import TokenObtainPairView
+
+from user.executors import hashing_executor, offload
 
 from user.serializers import UserSerializer
 
@@ -15,4 +19,10 @@ class ManageUserView(generics.RetrieveUpdateAPIView):
     permission_classes = (IsAuthenticated,)
 
     def get_object(self):
-        return self.request.user
+        # the authenticated user has only its flags loaded
+        return get_user_model().objects.get(pk=self.request.user.pk)
+
+
+# the endpoints hashing passwords, run outside of the request thread
+create_user = offload(CreateUserView.as_view(), hashing_executor)
+obtain_token_pair = offload(TokenObtainPairView.as_view(), hashing_executor)